@@ -1,24 +1,28 @@
 import time
 import logging
 from functools import wraps
-from typing import Callable, Any
+from typing import Callable, Any, Optional
 
 logger = logging.getLogger(__name__)
 
 class APICache:
     """
     Gerencia um cache simples em memória com TTL (Time-To-Live).
+
+    Funções decoradas sem TTL próprio usam `default_ttl`, lido a cada chamada,
+    o que permite alterá-lo em tempo de execução.
     """
-    def __init__(self):
+    def __init__(self, default_ttl: int = 60):
         self._cache: dict[str, Any] = {}
         self._timestamps: dict[str, float] = {}
+        self.default_ttl = default_ttl
 
-    def cached(self, ttl: int = 60) -> Callable:
+    def cached(self, ttl: Optional[int] = None) -> Callable:
         """
         Decorador para adicionar cache a uma função.
 
         Args:
-            ttl (int): Tempo de vida do cache em segundos.
+            ttl (Optional[int]): Tempo de vida do cache em segundos (`default_ttl` se omitido).
         """
         def decorator(func: Callable) -> Callable:
             @wraps(func)
@@ -28,11 +32,11 @@ class APICache:
 
                 if key in self._cache:
                     cache_time = self._timestamps.get(key, 0)
-                    if now - cache_time < ttl:
-                        logger.debug(f"Retornando resultado do cache para '{key}'.")
+                    if now - cache_time < (self.default_ttl if ttl is None else ttl):
+                        logger.debug("Retornando resultado do cache para '%s'.", key)
                         return self._cache[key]
 
-                logger.info(f"Cache expirado ou inexistente para '{key}'. Executando função.")
+                logger.debug("Cache expirado ou inexistente para '%s'. Executando função.", key)
                 result = func(*args, **kwargs)
                 
                 self._cache[key] = result
@@ -40,4 +44,20 @@ class APICache:
                 
                 return result
             return wrapper
-        return decorator
\ No newline at end of file
+        return decorator
+
+    def invalidate(self, func_name: Optional[str] = None) -> None:
+        """
+        Remove entradas do cache.
+
+        Args:
+            func_name (Optional[str]): Remove apenas as entradas desta função; todas se omitido.
+        """
+        if func_name is None:
+            self._cache.clear()
+            self._timestamps.clear()
+            return
+        prefix = f"{func_name}:"
+        for key in [key for key in self._cache if key.startswith(prefix)]:
+            self._cache.pop(key, None)
+            self._timestamps.pop(key, None)
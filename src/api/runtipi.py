@@ -1,55 +1,202 @@
+import sys
+import time
 import requests
+import threading
 import logging
-from typing import Any, final, Optional
-from dataclasses import dataclass
+from typing import Any, Callable, Mapping, final, Optional
+from dataclasses import dataclass, field
 from enum import Enum
 
 from .cache import APICache
 
 logger = logging.getLogger(__name__)
+
 class AppStatus(Enum):
     RUNNING = "running"
     STOPPED = "stopped"
+    STARTING = "starting"
+    STOPPING = "stopping"
+    RESTARTING = "restarting"
+    INSTALLING = "installing"
+    UNINSTALLING = "uninstalling"
+    UPDATING = "updating"
+    RESETTING = "resetting"
+    BACKING_UP = "backing_up"
+    RESTORING = "restoring"
+    MISSING = "missing"
     UNKNOWN = "unknown"
 
+# Tabela de lookup para evitar a construção de Enum (e a exceção) a cada app.
+_STATUS_LOOKUP: dict[str, AppStatus] = {status.value: status for status in AppStatus}
+
 class AppAction(Enum):
     START = "start"
     STOP = "stop"
-@dataclass
+@dataclass(slots=True)
 class RuntipiApp:
     id: str
     name: str
     status: AppStatus
     version: Optional[str] = None
-    
+    raw_status: Optional[str] = None  # Status original quando não mapeado em AppStatus
+
+    @staticmethod
+    def parse_status(value: Any) -> tuple[AppStatus, Optional[str]]:
+        """Converte o status bruto da API, preservando valores desconhecidos."""
+        if not isinstance(value, str):
+            return AppStatus.UNKNOWN, None
+        status = _STATUS_LOOKUP.get(value)
+        if status is not None:
+            return status, None
+        normalized = value.strip().lower()
+        status = _STATUS_LOOKUP.get(normalized)
+        if status is not None:
+            return status, None
+        return AppStatus.UNKNOWN, sys.intern(normalized)
+
+    @property
+    def status_label(self) -> str:
+        """Status para exibição (o valor bruto, se desconhecido)."""
+        return self.raw_status or self.status.value
+
     @classmethod
     def from_dict(cls, data: dict) -> 'RuntipiApp':
-        """Cria uma instância a partir de dados da API."""
+        """
+        Cria uma instância a partir de dados da API (formato plano).
+        Levanta um KeyError se não houver `id`, para que mudanças de formato sejam detectadas.
+        """
+        app_id = data['id']
+        status, raw_status = cls.parse_status(data.get('status', 'unknown'))
+        return cls(
+            id=app_id,
+            name=data.get('name') or app_id,
+            status=status,
+            version=data.get('version'),
+            raw_status=raw_status,
+        )
+
+    @classmethod
+    def from_nested_dict(cls, data: dict) -> 'RuntipiApp':
+        """Cria uma instância a partir do formato aninhado (`info` + `app`)."""
+        info = data['info']
+        app_id = info['id']
+        status, raw_status = cls.parse_status(data['app'].get('status', 'unknown'))
         return cls(
-            id=data.get('id', ''),
-            name=data.get('name', data.get('id', '')),
-            status=AppStatus(data.get('status', 'unknown')),
-            version=data.get('version')
+            id=app_id,
+            name=info.get('name') or app_id,
+            status=status,
+            version=info.get('version'),
+            raw_status=raw_status,
         )
+
+_RowParser = Callable[[dict], RuntipiApp]
+
+@final
+class InstalledAppsParser:
+    """
+    Converte o payload de /api/apps/installed em uma lista de RuntipiApp.
+
+    O formato das linhas é detectado uma única vez e reaproveitado nas
+    chamadas seguintes; linhas inválidas são descartadas sem invalidar a lista.
+    """
+    __slots__ = ('_row_parser',)
+
+    def __init__(self):
+        self._row_parser: Optional[_RowParser] = None
+
+    @staticmethod
+    def _unwrap(payload: Any) -> Optional[list]:
+        """Extrai a lista de apps do payload (lista pura ou `{"installed": [...]}`)."""
+        if isinstance(payload, dict):
+            payload = payload.get('installed', payload)
+        return payload if isinstance(payload, list) else None
+
+    @staticmethod
+    def _detect_row_parser(row: Any) -> Optional[_RowParser]:
+        """Identifica o formato de uma linha do payload."""
+        if not isinstance(row, dict):
+            return None
+        if isinstance(row.get('info'), dict) and isinstance(row.get('app'), dict):
+            return RuntipiApp.from_nested_dict
+        if 'id' in row:
+            return RuntipiApp.from_dict
+        return None
+
+    def parse(self, payload: Any) -> list[RuntipiApp]:
+        """Converte o payload completo, usando o caminho rápido quando possível."""
+        rows = self._unwrap(payload)
+        if rows is None:
+            logger.error("Resposta da API não é uma lista: %s", type(payload))
+            return []
+        if not rows:
+            return []
+
+        if self._row_parser is None:
+            self._row_parser = self._detect_row_parser(rows[0])
+
+        if self._row_parser is not None:
+            try:
+                return list(map(self._row_parser, rows))
+            except (KeyError, TypeError, AttributeError):
+                logger.debug("Formato do payload mudou; usando o caminho tolerante.")
+
+        return self._parse_tolerant(rows)
+
+    def _parse_tolerant(self, rows: list) -> list[RuntipiApp]:
+        """Detecta o formato linha a linha, descartando apenas as linhas inválidas."""
+        apps = []
+        for row in rows:
+            row_parser = self._detect_row_parser(row)
+            if row_parser is None:
+                logger.warning("Ignorando app com formato desconhecido: %r", row)
+                continue
+            try:
+                apps.append(row_parser(row))
+            except (KeyError, TypeError, AttributeError) as e:
+                logger.warning("Ignorando app com dados inválidos (%s): %r", e, row)
+                continue
+            self._row_parser = row_parser
+        return apps
 @dataclass
 class APIResponse:
     success: bool
     data: Any = None
     error: Optional[str] = None
+    status_code: Optional[int] = None
+    headers: Mapping[str, str] = field(default_factory=dict)
+
+    @property
+    def not_modified(self) -> bool:
+        """Indica se o servidor respondeu 304 a uma requisição condicional."""
+        return self.status_code == 304
 
 @final
 class RuntipiAPI:
     """
     Cliente HTTP para a API do Runtipi, gerenciando autenticação e chamadas.
+
+    Pode ser usado de várias threads ao mesmo tempo (`asyncio.to_thread`): o
+    login e a troca de sessão são serializados, e a lista de apps com seus
+    validadores é publicada como uma única tupla.
     """
-    def __init__(self, host: str, username: str, password: str, timeout: int = 15):
+    def __init__(self, host: str, username: str, password: str, timeout: int = 15, cache_ttl: int = 15):
         self._host = host.rstrip('/')  # Remove trailing slash
-        self._username = username
-        self._password = password
+        # Usuário e senha ficam juntos para serem trocados em uma única atribuição.
+        self._credentials = (username, password)
         self._timeout = timeout
+        # O Accept-Encoding padrão do requests já inclui `br` quando há brotli/brotlicffi instalado.
         self._session = requests.Session()
-        self._cache = APICache()
+        # Cache de TTL da lista de apps, por instância; invalidado após ações.
+        self._cache = APICache(default_ttl=cache_ttl)
+        self._cached_fetch = self._cache.cached()(self.fetch_installed_apps)
         self._is_authenticated = False
+        # Incrementado a cada login ou troca de credenciais; evita logins repetidos em paralelo.
+        self._auth_generation = 0
+        self._auth_lock = threading.Lock()
+        self._apps_parser = InstalledAppsParser()
+        # (apps, ETag, Last-Modified) da última lista recebida, sempre trocados juntos.
+        self._apps_state: Optional[tuple[list[RuntipiApp], Optional[str], Optional[str]]] = None
+        self._apps_lock = threading.Lock()
         self._endpoints = {
             'auth': '/api/auth/login',
             'apps': '/api/apps/installed',
@@ -60,31 +207,48 @@ class RuntipiAPI:
         """Constrói URL completa para um endpoint."""
         return f"{self._host}{endpoint}"
 
-    def _authenticate(self) -> bool:
-        """Realiza a autenticação na API do Runtipi e armazena a sessão."""
-        url = self._get_url(self._endpoints['auth'])
-        credentials = {"username": self._username, "password": self._password}
-        
-        try:
-            response = self._session.post(url, json=credentials, timeout=self._timeout)
-            response.raise_for_status()
-            self._is_authenticated = True
-            logger.info("Autenticação na API do Runtipi bem-sucedida.")
-            return True
-        except requests.RequestException as e:
-            logger.error(f"Falha ao autenticar na API do Runtipi: {e}")
-            self._is_authenticated = False
-            return False
+    def _authenticate(self, seen_generation: Optional[int] = None) -> bool:
+        """
+        Realiza a autenticação na API do Runtipi e armazena a sessão.
+
+        Serializado entre threads. Com `seen_generation`, não autentica de novo se
+        outra thread já renovou a sessão depois que a chamadora a viu falhar.
+        """
+        with self._auth_lock:
+            if (
+                seen_generation is not None
+                and self._is_authenticated
+                and self._auth_generation != seen_generation
+            ):
+                return True
+
+            url = self._get_url(self._endpoints['auth'])
+            username, password = self._credentials
+            credentials = {"username": username, "password": password}
+
+            try:
+                response = self._session.post(url, json=credentials, timeout=self._timeout)
+                response.raise_for_status()
+                self._is_authenticated = True
+                self._auth_generation += 1
+                logger.info("Autenticação na API do Runtipi bem-sucedida.")
+                return True
+            except requests.RequestException as e:
+                logger.error(f"Falha ao autenticar na API do Runtipi: {e}")
+                self._is_authenticated = False
+                return False
 
     def _make_request(self, method: str, endpoint: str, **kwargs: Any) -> APIResponse:
         """Método central para requisições, com lógica de reautenticação."""
-        if not self._is_authenticated and not self._authenticate():
+        generation = self._auth_generation
+        if not self._is_authenticated and not self._authenticate(generation):
             return APIResponse(
                 success=False, 
                 error="Não foi possível autenticar na API do Runtipi"
             )
 
         url = self._get_url(endpoint)
+        started = time.perf_counter()
         
         try:
             response = self._session.request(
@@ -93,62 +257,117 @@ class RuntipiAPI:
             
             if response.status_code == 401:  # Sessão expirada
                 logger.warning("Sessão expirada. Tentando reautenticar...")
-                if self._authenticate():
+                if self._authenticate(generation):
                     response = self._session.request(
                         method, url, timeout=self._timeout, **kwargs
                     )
             
             response.raise_for_status()
             data = response.json() if response.content else {}
+            duration_ms = (time.perf_counter() - started) * 1000
+            logger.debug(
+                "%s %s -> %s em %.1f ms", method.upper(), url, response.status_code, duration_ms,
+                extra={"duration_ms": round(duration_ms, 1)},
+            )
             
-            return APIResponse(success=True, data=data)
+            return APIResponse(
+                success=True,
+                data=data,
+                status_code=response.status_code,
+                headers=response.headers,
+            )
             
         except requests.RequestException as e:
-            logger.error(f"Erro na requisição para {method.upper()} {url}: {e}")
+            duration_ms = (time.perf_counter() - started) * 1000
+            logger.error(
+                "Erro na requisição para %s %s: %s", method.upper(), url, e,
+                extra={"duration_ms": round(duration_ms, 1)},
+            )
             return APIResponse(success=False, error=str(e))
 
+    def reconfigure(self, host: str, username: str, password: str, timeout: int, cache_ttl: int) -> None:
+        """
+        Aplica novas configurações sem recriar o cliente.
+
+        Requisições em andamento terminam com os valores antigos. Se o host ou as
+        credenciais mudarem, a sessão atual é descartada junto com a lista de apps
+        em cache, e a próxima requisição autentica novamente.
+        """
+        host = host.rstrip('/')
+        credentials = (username, password)
+        if host != self._host or credentials != self._credentials:
+            with self._auth_lock:
+                self._host, self._credentials = host, credentials
+                self._is_authenticated = False
+                self._auth_generation += 1
+                self._session.cookies.clear()
+            with self._apps_lock:
+                self._apps_state = None
+            self.invalidate_apps_cache()
+        self._timeout = timeout
+        self._cache.default_ttl = cache_ttl
+
     def test_connection(self) -> bool:
         """Testa se é possível conectar à API."""
         return self._authenticate()
 
-    @APICache().cached(ttl=15)
+    @staticmethod
+    def _conditional_headers(state: Optional[tuple[list[RuntipiApp], Optional[str], Optional[str]]]) -> dict[str, str]:
+        """Cabeçalhos de validação para a lista de apps em `state`."""
+        if state is None:
+            return {}
+        _, etag, last_modified = state
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
     def get_installed_apps(self) -> list[RuntipiApp]:
-        """Busca a lista de apps instalados (com cache de 15s)."""
+        """Busca a lista de apps instalados (com cache de `cache_ttl` segundos)."""
+        return self._cached_fetch()
+
+    def fetch_installed_apps(self) -> list[RuntipiApp]:
+        """
+        Busca a lista de apps instalados diretamente na API, sem o cache de TTL.
+
+        Usa requisições condicionais (ETag/Last-Modified): em um 304 a lista já
+        convertida é reaproveitada sem baixar nem processar o payload novamente.
+        """
         logger.debug("Buscando lista de apps instalados na API.")
+        # Lido uma única vez: um 304 se refere exatamente aos validadores enviados.
+        state = self._apps_state
         
-        response = self._make_request("GET", self._endpoints['apps'])
+        response = self._make_request(
+            "GET", self._endpoints['apps'], headers=self._conditional_headers(state)
+        )
         
         if not response.success:
-            logger.error(f"Falha ao buscar apps: {response.error}")
-            return []
-        try:
-            apps_data = response.data
-            if isinstance(apps_data, dict):
-                if 'installed' in apps_data:
-                    apps_list = apps_data['installed']
-                else:
-                    apps_list = apps_data
-            else:
-                apps_list = apps_data
-            
-            if not isinstance(apps_list, list):
-                logger.error(f"Resposta da API não é uma lista: {type(apps_list)}")
-                return []
-            return [RuntipiApp.from_dict(app) for app in apps_list]
-            
-        except (KeyError, TypeError, ValueError) as e:
-            logger.error(f"Erro ao processar dados dos apps: {e}")
+            logger.error("Falha ao buscar apps: %s", response.error)
             return []
 
+        if response.not_modified and state is not None:
+            logger.debug("Lista de apps não modificada (304); reutilizando a anterior.")
+            return state[0]
+
+        apps = self._apps_parser.parse(response.data)
+        with self._apps_lock:
+            self._apps_state = (apps, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return apps
+
     def _lifecycle_action(self, app_id: str, action: AppAction) -> APIResponse:
         """Executa uma ação de ciclo de vida (start, stop) em um app."""
-        logger.info(f"Executando ação '{action.value}' para o app '{app_id}'.")
+        logger.info("Executando ação '%s' para o app '%s'.", action.value, app_id)
         
         endpoint = self._endpoints['app_action'].format(
             app_id=app_id, action=action.value
         )
         
-        return self._make_request("POST", endpoint)
+        response = self._make_request("POST", endpoint)
+        if response.success:
+            self.invalidate_apps_cache()
+        return response
 
     def start_app(self, app_id: str) -> APIResponse:
         """Inicia um app."""
@@ -163,6 +382,10 @@ class RuntipiAPI:
         action = AppAction.STOP if current_status == AppStatus.RUNNING else AppAction.START
         return self._lifecycle_action(app_id, action)
 
+    def invalidate_apps_cache(self) -> None:
+        """Descarta a lista de apps em cache (ex.: após uma ação de ciclo de vida)."""
+        self._cache.invalidate()
+
     def find_app_by_id(self, app_id: str) -> Optional[RuntipiApp]:
         """Busca um app específico pelo ID."""
         apps = self.get_installed_apps()
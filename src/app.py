@@ -1,18 +1,18 @@
+import os
 import logging
 import asyncio
 import sys
 
 from config.settings import BotConfig
+from config.logging_setup import setup_logging
 from api.runtipi import RuntipiAPI
 from bot.core import RuntipiBot
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stdout,
+
+# A escrita dos logs roda na thread do listener, fora do event loop.
+log_listener = setup_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    fmt=os.getenv("LOG_FORMAT", "text").lower(),
 )
-logging.getLogger("httpx").setLevel(logging.WARNING)
-logging.getLogger("urllib3").setLevel(logging.WARNING)
-logging.getLogger("requests").setLevel(logging.WARNING)
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +22,11 @@ async def main() -> None:
         config = BotConfig.from_env()
         logger.info("Configuração carregada com sucesso.")
         runtipi_api = RuntipiAPI(
+            host=config.runtipi_host,
             username=config.runtipi_username,
-            password=config.runtipi_password
+            password=config.runtipi_password,
+            timeout=config.api_timeout,
+            cache_ttl=config.cache_ttl,
         )
         bot = RuntipiBot(config=config, runtipi_api=runtipi_api)
         await bot.run()
@@ -39,4 +42,7 @@ if __name__ == '__main__':
     try:
         asyncio.run(main())
     except (KeyboardInterrupt, SystemExit):
-        logger.info("Programa encerrado pelo usuário.")
\ No newline at end of file
+        logger.info("Programa encerrado pelo usuário.")
+    finally:
+        # Descarrega os registros ainda na fila antes de sair.
+        log_listener.stop()
\ No newline at end of file
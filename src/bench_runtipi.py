@@ -0,0 +1,269 @@
+import gc
+import gzip
+import json
+import queue
+import hashlib
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import QueueListener
+from typing import Optional
+
+from api.runtipi import AppStatus, InstalledAppsParser, RuntipiAPI
+from config.logging_setup import TEXT_FORMAT, JsonFormatter, RequestContextFilter, _DeferredQueueHandler
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATUSES = ["running", "stopped", "installing", "updating", "missing", "starting"]
+
+@dataclass
+class _LegacyApp:
+    """Modelo anterior (dataclass sem __slots__, Enum construído por app)."""
+    id: str
+    name: str
+    status: AppStatus
+    version: Optional[str] = None
+
+def _legacy_parse(payload: dict) -> list[_LegacyApp]:
+    """Parser anterior, adaptado ao formato aninhado para efeito de comparação."""
+    return [
+        _LegacyApp(
+            id=row['info']['id'],
+            name=row['info'].get('name', row['info']['id']),
+            status=AppStatus(row['app'].get('status', 'unknown')),
+            version=row['info'].get('version'),
+        )
+        for row in payload['installed']
+    ]
+
+def _make_payload(count: int) -> dict:
+    """Gera um payload no formato real de /api/apps/installed."""
+    return {
+        "installed": [
+            {
+                "info": {"id": f"app-{i}", "name": f"App {i}", "version": "1.0.0"},
+                "app": {"status": STATUSES[i % len(STATUSES)]},
+            }
+            for i in range(count)
+        ]
+    }
+
+def _measure(label: str, parse, payload: dict, rounds: int) -> None:
+    """Mede o tempo médio de parse e o pico de memória da lista resultante."""
+    parse(payload)  # Aquecimento
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        parse(payload)
+    elapsed_ms = (time.perf_counter() - start) / rounds * 1000
+
+    gc.collect()
+    tracemalloc.start()
+    result = parse(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<10} {elapsed_ms:8.2f} ms/parse  {peak / 1024:9.1f} KiB pico  ({len(result)} apps)")
+
+def bench_installed_apps_parse() -> None:
+    """Compara o parser atual com o modelo anterior em listas grandes."""
+    print("🧪 Benchmark: parse de /api/apps/installed")
+    legacy_statuses = {"running", "stopped", "unknown"}
+    for count in (100, 1_000, 10_000):
+        payload = _make_payload(count)
+        # O parser antigo levanta ValueError para status fora de running/stopped/unknown.
+        legacy_payload = {
+            "installed": [
+                row if row["app"]["status"] in legacy_statuses
+                else {"info": row["info"], "app": {"status": "stopped"}}
+                for row in payload["installed"]
+            ]
+        }
+        print(f"📱 {count} apps:")
+        _measure("anterior", _legacy_parse, legacy_payload, rounds=20)
+        _measure("atual", InstalledAppsParser().parse, payload, rounds=20)
+
+class _StubRuntipiHandler(BaseHTTPRequestHandler):
+    """Simula os endpoints do Runtipi usados pelo bot, com ETag e compressão."""
+    server: 'StubRuntipiServer'
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        self.server.bytes_sent += len(body)
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/api/auth/login":
+            self._send(200, b"{}", {"Content-Type": "application/json"})
+        else:
+            self._send(404)
+
+    def do_GET(self) -> None:
+        if self.path != "/api/apps/installed":
+            self._send(404)
+            return
+
+        validators = {"ETag": self.server.etag, "Last-Modified": self.server.last_modified}
+        # Como em servidores reais (RFC 7232), If-None-Match tem precedência sobre If-Modified-Since.
+        if_none_match = self.headers.get("If-None-Match")
+        if (
+            if_none_match == self.server.etag
+            if if_none_match is not None
+            else self.headers.get("If-Modified-Since") == self.server.last_modified
+        ):
+            self._send(304, headers=validators)
+            return
+
+        body = self.server.body
+        headers = {"Content-Type": "application/json", **validators}
+        accepted = self.headers.get("Accept-Encoding", "")
+        if brotli is not None and "br" in accepted:
+            body = self.server.body_br
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = self.server.body_gzip
+            headers["Content-Encoding"] = "gzip"
+        self._send(200, body, headers)
+
+class StubRuntipiServer(ThreadingHTTPServer):
+    """Servidor local que serve um payload fixo de /api/apps/installed."""
+
+    def __init__(self, payload: dict):
+        super().__init__(("127.0.0.1", 0), _StubRuntipiHandler)
+        self.bytes_sent = 0
+        self.set_payload(payload)
+
+    def set_payload(self, payload: dict) -> None:
+        """Troca o payload servido, gerando novos validadores."""
+        self.body = json.dumps(payload).encode()
+        self.body_gzip = gzip.compress(self.body)
+        self.body_br = brotli.compress(self.body) if brotli is not None else b""
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()}"'
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def bench_installed_apps_fetch(count: int = 2_000, rounds: int = 50) -> None:
+    """Compara refreshes completos, comprimidos e condicionais contra o stub."""
+    print(f"🧪 Benchmark: refresh de /api/apps/installed ({count} apps, {rounds} refreshes)")
+    server = StubRuntipiServer(_make_payload(count))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    scenarios = {
+        "completo": dict(compressed=False, conditional=False),
+        "comprimido": dict(compressed=True, conditional=False),
+        "condicional": dict(compressed=True, conditional=True),
+    }
+    try:
+        for label, options in scenarios.items():
+            api = RuntipiAPI(host=server.url, username="bench", password="bench")
+            if not options["compressed"]:
+                api._session.headers["Accept-Encoding"] = "identity"
+            # Ignora o cache de TTL para medir apenas o custo do refresh.
+            fetch = RuntipiAPI.fetch_installed_apps
+            fetch(api)  # Aquecimento e autenticação
+
+            server.bytes_sent = 0
+            start = time.perf_counter()
+            for _ in range(rounds):
+                if not options["conditional"]:
+                    api._apps_state = None
+                apps = fetch(api)
+            elapsed_ms = (time.perf_counter() - start) / rounds * 1000
+            print(
+                f"  {label:<12} {elapsed_ms:8.2f} ms/refresh  "
+                f"{server.bytes_sent / rounds / 1024:9.1f} KiB/refresh  ({len(apps)} apps)"
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+class _SlowStream:
+    """Stream que bloqueia a cada escrita, como um stdout em pipe com o leitor atrasado."""
+
+    def __init__(self, stream, delay: float = 0.0002):
+        self._stream = stream
+        self._delay = delay
+
+    def write(self, data: str) -> int:
+        time.sleep(self._delay)
+        return self._stream.write(data)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+def _per_call_ns(log_call, rounds: int) -> float:
+    """Tempo médio, na thread que loga, de uma chamada de log."""
+    log_call(0)  # Aquecimento
+    start = time.perf_counter_ns()
+    for i in range(rounds):
+        log_call(i)
+    return (time.perf_counter_ns() - start) / rounds
+
+def bench_logging(rounds: int = 50_000) -> None:
+    """Custo por chamada de log na thread do event loop: formatação ansiosa x preguiçosa e handlers."""
+    print("🧪 Benchmark: custo por chamada de log")
+    key = f"get_installed_apps:{(object(),)!s}:{{}}"
+    bench_logger = logging.getLogger("bench.logging")
+    bench_logger.propagate = False
+
+    # Nível filtrado: o f-string é montado mesmo sem o registro ser emitido.
+    bench_logger.setLevel(logging.INFO)
+    eager = _per_call_ns(lambda i: bench_logger.debug(f"Cache expirado ou inexistente para '{key}' ({i})."), rounds)
+    lazy = _per_call_ns(lambda i: bench_logger.debug("Cache expirado ou inexistente para '%s' (%d).", key, i), rounds)
+    print(f"  {'DEBUG filtrado, f-string':<38} {eager:8.0f} ns/chamada")
+    print(f"  {'DEBUG filtrado, preguiçoso':<38} {lazy:8.0f} ns/chamada")
+
+    # Nível ativo: escrita síncrona na thread que loga x enfileiramento.
+    with open(os.devnull, "w") as devnull:
+        scenarios = (
+            ("texto, /dev/null", devnull, logging.Formatter(TEXT_FORMAT), rounds),
+            ("json, /dev/null", devnull, JsonFormatter(), rounds),
+            ("texto, pipe lento", _SlowStream(devnull), logging.Formatter(TEXT_FORMAT), rounds // 25),
+        )
+        for label, stream, formatter, scenario_rounds in scenarios:
+            stream_handler = logging.StreamHandler(stream)
+            stream_handler.setFormatter(formatter)
+            bench_logger.handlers[:] = [stream_handler]
+            direct = _per_call_ns(lambda i: bench_logger.info("Executando ação '%s' para o app '%s'.", "start", i), scenario_rounds)
+
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            queue_handler = _DeferredQueueHandler(log_queue)
+            queue_handler.addFilter(RequestContextFilter())
+            bench_logger.handlers[:] = [queue_handler]
+            listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+            listener.start()
+            try:
+                queued = _per_call_ns(lambda i: bench_logger.info("Executando ação '%s' para o app '%s'.", "start", i), scenario_rounds)
+            finally:
+                listener.stop()
+            print(f"  {'INFO ' + label + ', StreamHandler':<38} {direct:8.0f} ns/chamada")
+            print(f"  {'INFO ' + label + ', QueueHandler':<38} {queued:8.0f} ns/chamada")
+    bench_logger.handlers.clear()
+
+if __name__ == "__main__":
+    bench_installed_apps_parse()
+    print()
+    bench_installed_apps_fetch()
+    print()
+    bench_logging()
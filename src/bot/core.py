@@ -1,13 +1,26 @@
+import os
+import signal
+import dataclasses
+import asyncio
 import logging
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram import Update
 
-from config.settings import BotConfig
+from config.settings import BotConfig, RESTART_REQUIRED_FIELDS
 from api.runtipi import RuntipiAPI
 from bot.middleware.auth import AuthMiddleware
+from bot.handlers.admin_handler import AdminCommandHandler
 from bot.handlers.basic_handler import BasicCommandHandler
+from bot.handlers.history_handler import HistoryCommandHandler
 from bot.handlers.app_handler import AppCommandHandler
 from bot.handlers.script_handler import ScriptCommandHandler
+from bot.handlers.schedule_handler import ScheduleCommandHandler
+from bot.services.action_registry import ActionRegistry
+from bot.services.app_watcher import AppStateWatcher
+from bot.services.audit_log import AuditLog
+from bot.services.concurrency import ChatOrderedUpdateProcessor, TaskLane
+from bot.services.scheduler import Scheduler, ScheduleEntry
+from bot.utils.messages import BotMessages
 
 logger = logging.getLogger(__name__)
 
@@ -18,21 +31,50 @@ class RuntipiBot:
         self.config = config
         self.api = runtipi_api
         
-        auth = AuthMiddleware(allowed_chat_id=self.config.telegram_chat_id)
+        self.audit = AuditLog(
+            self.config.audit_log_path or os.path.join(self.config.data_path, "audit.log"),
+            max_bytes=self.config.audit_max_bytes,
+        )
+        auth = AuthMiddleware(allowed_chat_id=self.config.telegram_chat_id, audit=self.audit)
+        self._auth = auth
 
         basic_handlers = BasicCommandHandler()
-        app_handlers = AppCommandHandler(self.api)
-        script_handlers = ScriptCommandHandler(self.config.scripts_path)
+        self.watcher = AppStateWatcher(self.api, timeout=self.config.action_timeout)
+        self.actions = ActionRegistry()
+        app_handlers = AppCommandHandler(self.api, self.watcher, self.actions, self.audit)
+        self.script_lane = TaskLane("scripts", self.config.max_concurrent_scripts)
+        script_handlers = ScriptCommandHandler(
+            self.config.scripts_path, self.script_lane, self.audit, self.config.script_profiles_path
+        )
+        self._app_handlers = app_handlers
+        self._script_handlers = script_handlers
+
+        self.scheduler = Scheduler(
+            os.path.join(self.config.data_path, "schedule.json"), self._run_scheduled
+        )
+        schedule_handlers = ScheduleCommandHandler(self.scheduler, script_handlers)
+        admin_handlers = AdminCommandHandler(self.reload_config)
+        history_handlers = HistoryCommandHandler(self.audit)
+        self._stop_event = asyncio.Event()
         
-        self.application = Application.builder().token(self.config.telegram_token).build()
+        self.application = (
+            Application.builder()
+            .token(self.config.telegram_token)
+            .concurrent_updates(ChatOrderedUpdateProcessor(self.config.max_concurrent_updates))
+            .build()
+        )
 
         self.application.add_handlers([
             CommandHandler("start", auth(basic_handlers.start)),
             CommandHandler("help", auth(basic_handlers.help)),
             CommandHandler("apps", auth(app_handlers.list_apps)),
             CommandHandler("status", auth(app_handlers.summary)),
+            CommandHandler("restart", auth(app_handlers.restart_app)),
             CommandHandler("scripts", auth(script_handlers.list_scripts)),
             CommandHandler("run", auth(script_handlers.run_script)),
+            CommandHandler("schedule", auth(schedule_handlers.schedule)),
+            CommandHandler("history", auth(history_handlers.history)),
+            CommandHandler("reload", auth(admin_handlers.reload)),
             MessageHandler(filters.TEXT & ~filters.COMMAND, auth(app_handlers.toggle_app))
         ])
         
@@ -47,12 +89,127 @@ class RuntipiBot:
                 text="🔴 Ocorreu um erro interno ao processar sua solicitação."
             )
 
+    async def _run_scheduled(self, entry: ScheduleEntry) -> None:
+        """Executa uma tarefa agendada pelos mesmos caminhos dos comandos manuais."""
+        chat_id = self.config.telegram_chat_id
+        await self.application.bot.send_message(
+            chat_id,
+            f"{BotMessages.format_loading_message(f'Tarefa agendada `{entry.id}`')} "
+            f"{BotMessages.format_schedule_entry(entry)}",
+            parse_mode='Markdown'
+        )
+        if entry.kind == "script":
+            error = self._script_handlers.validate_script(entry.target)
+            if error:
+                await self.application.bot.send_message(
+                    chat_id, BotMessages.format_error_message(error), parse_mode='Markdown'
+                )
+                return
+            # Como no /run: a fila de scripts é dona da execução (e do timeout de encerramento).
+            self._script_handlers.submit_script(
+                self.application.bot, chat_id, entry.target, actor="scheduler"
+            )
+        else:
+            await self._app_handlers.request_action(
+                self.application, chat_id, entry.target, entry.action, actor="scheduler"
+            )
+
+    def reload_config(self) -> tuple[list[str], list[str]]:
+        """
+        Relê e valida a configuração, aplicando os valores alterados sem reiniciar.
+
+        A validação acontece antes de qualquer troca, e as trocas não têm `await`
+        entre si: handlers nunca veem uma mistura das duas configurações. Scripts e
+        ações em andamento terminam com os valores com que começaram. Campos de
+        RESTART_REQUIRED_FIELDS são mantidos e apenas reportados.
+
+        Returns:
+            tuple[list[str], list[str]]: Campos aplicados e campos que exigem reinício.
+        """
+        new_config = BotConfig.reload()
+        changed = self.config.changed_fields(new_config)
+        restart_required = [name for name in changed if name in RESTART_REQUIRED_FIELDS]
+        applied = [name for name in changed if name not in RESTART_REQUIRED_FIELDS]
+        new_config = dataclasses.replace(
+            new_config, **{name: getattr(self.config, name) for name in restart_required}
+        )
+
+        # Pode falhar se o diretório sumir após a validação; por isso vem antes das demais trocas.
+        if {"scripts_path", "script_profiles_path"} & set(applied):
+            self._script_handlers.reconfigure(new_config.scripts_path, new_config.script_profiles_path)
+        self.api.reconfigure(
+            host=new_config.runtipi_host,
+            username=new_config.runtipi_username,
+            password=new_config.runtipi_password,
+            timeout=new_config.api_timeout,
+            cache_ttl=new_config.cache_ttl,
+        )
+        self._auth.allowed_chat_id = new_config.telegram_chat_id
+        self.watcher.timeout = new_config.action_timeout
+        self.config = new_config
+
+        # Apenas os nomes: os valores podem conter segredos.
+        logger.info(f"Configuração recarregada. Aplicado: {', '.join(applied) or 'nenhuma alteração'}.")
+        if restart_required:
+            logger.warning(f"Alterações ignoradas até reiniciar o bot: {', '.join(restart_required)}.")
+        return applied, restart_required
+
+    def _reload_from_signal(self) -> None:
+        """Recarrega a configuração ao receber SIGHUP."""
+        logger.info("SIGHUP recebido; recarregando a configuração...")
+        try:
+            self.reload_config()
+        except (ValueError, FileNotFoundError) as e:
+            logger.error(f"Recarga de configuração rejeitada; mantendo a atual: {e}")
+
+    async def _drain(self) -> None:
+        """Aguarda scripts e ações em andamento, cancelando o que exceder SHUTDOWN_TIMEOUT."""
+        timeout = self.config.shutdown_timeout
+        scripts, actions = self.script_lane.pending, len(self.actions.pending())
+        if not scripts and not actions:
+            return
+
+        logger.info(f"Aguardando {scripts} script(s) e {actions} ação(ões) em andamento (até {timeout}s)...")
+        cancelled = sum(await asyncio.gather(
+            self.script_lane.drain(timeout),
+            self.actions.drain(timeout),
+        ))
+        if cancelled:
+            logger.warning(f"{cancelled} tarefa(s) interrompida(s) após {timeout}s.")
+
+    def stop(self) -> None:
+        """Solicita o encerramento do bot."""
+        self._stop_event.set()
+
     async def run(self) -> None:
         """Inicia o polling do Telegram e aguarda o encerramento."""
         logger.info("Iniciando o bot...")
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+        loop.add_signal_handler(signal.SIGHUP, self._reload_from_signal)
         
-        async with self.application:
-            await self.application.start()
-            logger.info("Bot iniciado e recebendo updates.")
-            await self.application.run_polling()
-        logger.info("Bot encerrado gracefully.")
\ No newline at end of file
+        self.audit.open()
+        try:
+            # Antes de receber updates: um /schedule add já na fila não pode ser sobrescrito pelo load().
+            self.scheduler.load()
+            async with self.application:
+                await self.application.start()
+                await self.application.updater.start_polling()
+                await self.scheduler.start()
+                logger.info("Bot iniciado e recebendo updates.")
+
+                await self._stop_event.wait()
+
+                logger.info("Encerrando o bot...")
+                await self.application.updater.stop()
+                await self.scheduler.stop()
+                # O watcher continua ativo: as ações em andamento dependem dele para terminar.
+                await self._drain()
+                await self.watcher.close()
+                await self.application.stop()
+        finally:
+            # Por último, para incluir os resultados das tarefas drenadas.
+            self.audit.close()
+        logger.info("Bot encerrado gracefully.")
@@ -0,0 +1,32 @@
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+from typing import Callable, final
+
+from bot.utils.messages import BotMessages
+
+logger = logging.getLogger(__name__)
+
+# Recarrega a configuração e retorna (campos aplicados, campos que exigem reinício).
+ConfigReloader = Callable[[], tuple[list[str], list[str]]]
+
+@final
+class AdminCommandHandler:
+    """Handlers administrativos do bot."""
+
+    def __init__(self, reload_config: ConfigReloader):
+        self._reload_config = reload_config
+
+    async def reload(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handler para o comando /reload."""
+        try:
+            applied, restart_required = self._reload_config()
+        except (ValueError, FileNotFoundError) as e:
+            logger.error(f"Recarga de configuração rejeitada: {e}")
+            # Sem Markdown: a mensagem pode conter caminhos e nomes com `_`.
+            await update.effective_chat.send_message(
+                BotMessages.format_error_message(f"{e}. A configuração atual foi mantida.", "recarregar a configuração")
+            )
+            return
+        message = BotMessages.format_config_reload(applied, restart_required)
+        await update.effective_chat.send_message(message, parse_mode='Markdown')
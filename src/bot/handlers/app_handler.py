@@ -1,9 +1,13 @@
+import asyncio
 import logging
-from telegram import Update
-from telegram.ext import ContextTypes
-from typing import final
+from telegram import Bot, Update
+from telegram.ext import Application, ContextTypes
+from typing import Optional, final
 
-from api.runtipi import RuntipiAPI, AppStatus
+from api.runtipi import RuntipiAPI, AppStatus, AppAction
+from bot.services.action_registry import ActionRegistry, InFlightAction
+from bot.services.app_watcher import AppStateWatcher
+from bot.services.audit_log import AuditEntry, AuditLog, actor_for
 from bot.utils.messages import BotMessages
 
 logger = logging.getLogger(__name__)
@@ -12,8 +16,11 @@ logger = logging.getLogger(__name__)
 class AppCommandHandler:
     """Handlers para comandos relacionados a aplicativos Runtipi."""
     
-    def __init__(self, runtipi_api: RuntipiAPI):
+    def __init__(self, runtipi_api: RuntipiAPI, watcher: AppStateWatcher, registry: ActionRegistry, audit: AuditLog):
         self._api = runtipi_api
+        self._watcher = watcher
+        self._registry = registry
+        self._audit = audit
 
     async def list_apps(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handler para o comando /apps."""
@@ -22,7 +29,7 @@ class AppCommandHandler:
                 BotMessages.format_loading_message("Buscando aplicativos")
             )
             
-            apps = self._api.get_installed_apps()
+            apps = await asyncio.to_thread(self._api.get_installed_apps)
             message = BotMessages.format_apps_list(apps)
             await context.bot.edit_message_text(
                 chat_id=update.effective_chat.id,
@@ -46,7 +53,7 @@ class AppCommandHandler:
                 BotMessages.format_loading_message("Verificando status do sistema")
             )
             
-            apps = self._api.get_installed_apps()
+            apps = await asyncio.to_thread(self._api.get_installed_apps)
             message = BotMessages.format_status_summary(apps)
             
             await context.bot.edit_message_text(
@@ -67,48 +74,9 @@ class AppCommandHandler:
     async def toggle_app(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handler para mensagens de texto para ligar/desligar apps."""
         app_id = update.message.text.strip().lower()
-        
-        try:
-            target_app = self._api.find_app_by_id(app_id)
-
-            if not target_app:
-                await update.effective_chat.send_message(
-                    BotMessages.format_error_message(
-                        f"Aplicativo `{app_id}` não encontrado"
-                    ),
-                    parse_mode='Markdown'
-                )
-                return
-            action = "stop" if target_app.status == AppStatus.RUNNING else "start"
-            action_verb = "Desligando" if action == "stop" else "Ligando"
-            loading_msg = await update.effective_chat.send_message(
-                BotMessages.format_loading_message(f"{action_verb} `{app_id}`"),
-                parse_mode='Markdown'
-            )
-            response = self._api.toggle_app_action(app_id, target_app.status)
-            if response.success:
-                result_message = BotMessages.format_app_action_result(
-                    app_id, action, True
-                )
-            else:
-                result_message = BotMessages.format_app_action_result(
-                    app_id, action, False, response.error
-                )
-            
-            await context.bot.edit_message_text(
-                chat_id=update.effective_chat.id,
-                message_id=loading_msg.message_id,
-                text=result_message,
-                parse_mode='Markdown'
-            )
-            
-        except Exception as e:
-            logger.error(f"Erro ao alternar app {app_id}: {e}", exc_info=True)
-            error_msg = BotMessages.format_error_message(
-                f"Erro interno ao interagir com o app `{app_id}`",
-                "toggle_app"
-            )
-            await update.effective_chat.send_message(error_msg, parse_mode='Markdown')
+        await self.request_action(
+            context.application, update.effective_chat.id, app_id, "toggle", update=update
+        )
 
     async def restart_app(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handler para reiniciar um app (parar e iniciar)."""
@@ -120,54 +88,187 @@ class AppCommandHandler:
             return
         
         app_id = context.args[0].strip().lower()
-        
+        await self.request_action(
+            context.application, update.effective_chat.id, app_id, "restart", update=update
+        )
+
+    async def request_action(
+        self,
+        application: Application,
+        chat_id: int,
+        app_id: str,
+        action: str,
+        update: Optional[Update] = None,
+        actor: Optional[str] = None,
+    ) -> None:
+        """
+        Decide e registra a ação para o app, executando-a em segundo plano.
+
+        Usado tanto pelos comandos quanto pelo agendador. Se já houver uma ação
+        pendente para o app, a nova mensagem apenas passa a acompanhar a ação
+        existente.
+
+        Args:
+            application (Application): Aplicação do bot, usada para enviar mensagens e criar tarefas.
+            chat_id (int): Chat que recebe o progresso.
+            app_id (str): ID do app.
+            action (str): `toggle`, `start`, `stop` ou `restart`.
+            update (Optional[Update]): Update de origem, para o tratamento de erros.
+            actor (Optional[str]): Quem pediu a ação (padrão: o autor do update, ou o chat).
+        """
+        bot = application.bot
+        if actor is None:
+            actor = actor_for(update) if update is not None else f"chat:{chat_id}"
         try:
-            target_app = self._api.find_app_by_id(app_id)
-            
-            if not target_app:
-                await update.effective_chat.send_message(
-                    BotMessages.format_error_message(f"App `{app_id}` não encontrado"),
-                    parse_mode='Markdown'
-                )
-                return
-            
-            loading_msg = await update.effective_chat.send_message(
-                BotMessages.format_loading_message(f"Reiniciando `{app_id}`"),
-                parse_mode='Markdown'
-            )
-            if target_app.status == AppStatus.RUNNING:
-                stop_response = self._api.stop_app(app_id)
-                if not stop_response.success:
-                    await context.bot.edit_message_text(
-                        chat_id=update.effective_chat.id,
-                        message_id=loading_msg.message_id,
-                        text=BotMessages.format_error_message(
-                            f"Falha ao parar o app `{app_id}`: {stop_response.error}"
+            async with self._registry.lock(app_id):
+                in_flight = self._registry.get(app_id)
+                if in_flight:
+                    follow_msg = await bot.send_message(
+                        chat_id,
+                        BotMessages.format_app_action_in_progress(app_id, in_flight.action),
+                        parse_mode='Markdown'
+                    )
+                    in_flight.attach(chat_id, follow_msg.message_id)
+                    return
+
+                target_app = await asyncio.to_thread(self._api.find_app_by_id, app_id)
+                if not target_app:
+                    await bot.send_message(
+                        chat_id,
+                        BotMessages.format_error_message(
+                            f"Aplicativo `{app_id}` não encontrado"
                         ),
                         parse_mode='Markdown'
                     )
                     return
-            start_response = self._api.start_app(app_id)
-            
-            if start_response.success:
-                result_message = BotMessages.format_success_message(
-                    f"App `{app_id}` reiniciado com sucesso!"
-                )
-            else:
-                result_message = BotMessages.format_error_message(
-                    f"Falha ao iniciar o app `{app_id}`: {start_response.error}"
+
+                was_running = target_app.status == AppStatus.RUNNING
+                if action == "toggle":
+                    action = "stop" if was_running else "start"
+                if (action == "start" and was_running) or (
+                    action == "stop" and target_app.status == AppStatus.STOPPED
+                ):
+                    await bot.send_message(
+                        chat_id,
+                        BotMessages.format_warning_message(
+                            f"App `{app_id}` já está `{target_app.status_label}`."
+                        ),
+                        parse_mode='Markdown'
+                    )
+                    return
+
+                if action == "restart":
+                    steps = [(AppAction.START, AppStatus.RUNNING)]
+                    if was_running:
+                        steps.insert(0, (AppAction.STOP, AppStatus.STOPPED))
+                elif action == "stop":
+                    steps = [(AppAction.STOP, AppStatus.STOPPED)]
+                else:
+                    steps = [(AppAction.START, AppStatus.RUNNING)]
+
+                loading_msg = await bot.send_message(
+                    chat_id,
+                    BotMessages.format_app_action_progress(app_id, action),
+                    parse_mode='Markdown'
                 )
-            
-            await context.bot.edit_message_text(
-                chat_id=update.effective_chat.id,
-                message_id=loading_msg.message_id,
-                text=result_message,
-                parse_mode='Markdown'
+                operation = self._registry.begin(app_id, action, actor)
+                operation.attach(chat_id, loading_msg.message_id)
+
+            # As chamadas à API e o acompanhamento seguem em segundo plano.
+            operation.task = application.create_task(
+                self._run_action(bot, operation, steps),
+                update=update,
             )
-            
+
         except Exception as e:
-            logger.error(f"Erro ao reiniciar app {app_id}: {e}", exc_info=True)
+            logger.error(f"Erro ao executar '{action}' no app {app_id}: {e}", exc_info=True)
             error_msg = BotMessages.format_error_message(
-                f"Erro interno ao reiniciar o app `{app_id}`"
+                f"Erro interno ao interagir com o app `{app_id}`",
+                "restart_app" if action == "restart" else "toggle_app"
             )
-            await update.effective_chat.send_message(error_msg, parse_mode='Markdown')
\ No newline at end of file
+            await bot.send_message(chat_id, error_msg, parse_mode='Markdown')
+
+    async def _run_action(
+        self,
+        bot: Bot,
+        operation: InFlightAction,
+        steps: list[tuple[AppAction, AppStatus]],
+    ) -> None:
+        """Executa cada etapa (POST + espera pelo status alvo) e reporta o resultado."""
+        app_id, action = operation.app_id, operation.action
+        lifecycle = {AppAction.START: self._api.start_app, AppAction.STOP: self._api.stop_app}
+
+        async def on_progress(status: AppStatus, elapsed: float) -> None:
+            await self._edit_targets(
+                bot, operation,
+                BotMessages.format_app_action_progress(app_id, action, status.value, operation.elapsed)
+            )
+
+        outcome, details = "cancelled", {}
+        try:
+            for step_action, target in steps:
+                response = await asyncio.to_thread(lifecycle[step_action], app_id)
+                if not response.success:
+                    outcome, details = "failed", {"step": step_action.value, "error": response.error}
+                    result_message = BotMessages.format_app_action_result(
+                        app_id, step_action.value, False, response.error
+                    )
+                    break
+
+                result = await self._watcher.wait_for(app_id, target, on_progress=on_progress)
+                details = {"status": result.status.value}
+                if result.timed_out:
+                    outcome = "timeout"
+                    result_message = BotMessages.format_app_action_timeout(
+                        app_id, action, result.status.value, operation.elapsed
+                    )
+                    break
+                if not result.reached:
+                    outcome = "failed"
+                    details["step"] = step_action.value
+                    result_message = BotMessages.format_app_action_result(
+                        app_id, step_action.value, False,
+                        f"o app terminou com status `{result.status.value}`"
+                    )
+                    break
+            else:
+                outcome = "ok"
+                result_message = BotMessages.format_app_action_result(
+                    app_id, action, True, elapsed=operation.elapsed
+                )
+        except Exception as e:
+            logger.error(f"Erro ao executar '{action}' no app {app_id}: {e}", exc_info=True)
+            outcome, details = "error", {"error": str(e)}
+            result_message = BotMessages.format_error_message(
+                f"Erro interno ao interagir com o app `{app_id}`"
+            )
+        finally:
+            self._registry.finish(operation)
+            self._audit.record(AuditEntry(
+                event="action",
+                actor=operation.actor or "desconhecido",
+                action=action,
+                target=app_id,
+                outcome=outcome,
+                duration=round(operation.elapsed, 2),
+                details=details,
+            ))
+
+        await self._edit_targets(bot, operation, result_message)
+
+    @staticmethod
+    async def _edit_targets(bot: Bot, operation: InFlightAction, text: str) -> None:
+        """Atualiza todas as mensagens que acompanham a ação."""
+        for (chat_id, message_id), last_text in list(operation.targets.items()):
+            if text == last_text:
+                continue
+            operation.targets[(chat_id, message_id)] = text
+            try:
+                await bot.edit_message_text(
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    text=text,
+                    parse_mode='Markdown'
+                )
+            except Exception as e:
+                logger.warning(f"Falha ao atualizar mensagem {message_id} do app '{operation.app_id}': {e}")
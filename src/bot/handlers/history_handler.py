@@ -0,0 +1,40 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+from typing import final
+
+from bot.services.audit_log import AuditLog
+from bot.utils.messages import BotMessages
+
+_DEFAULT_LIMIT = 10
+_MAX_LIMIT = 30  # Mantém a resposta abaixo do limite de tamanho de mensagem do Telegram
+_USAGE = "Uso: `/history [app] [n]` (ex: `/history`, `/history 20`, `/history jellyfin 5`)"
+
+@final
+class HistoryCommandHandler:
+    """Handler do /history, respondido a partir do índice em memória do log de auditoria."""
+
+    def __init__(self, audit: AuditLog):
+        self._audit = audit
+
+    async def history(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handler para o comando /history."""
+        args = list(context.args or [])
+        limit = _DEFAULT_LIMIT
+        if args and args[-1].isdigit():
+            limit = min(max(int(args.pop()), 1), _MAX_LIMIT)
+        if len(args) > 1:
+            await update.effective_chat.send_message(_USAGE, parse_mode='Markdown')
+            return
+
+        target = args[0] if args else None
+        if target is not None and not self._audit.recent(target, limit=1):
+            target = target.lower()  # IDs de apps são minúsculos; scripts usam o nome exato
+
+        durations = None
+        if target is not None:
+            durations = [
+                entry.duration for entry in self._audit.recent(target, limit=self._audit.PER_TARGET_SIZE)
+                if entry.outcome == "ok" and entry.duration is not None
+            ]
+        message = BotMessages.format_history(self._audit.recent(target, limit), target, durations)
+        await update.effective_chat.send_message(message, parse_mode='Markdown')
@@ -0,0 +1,89 @@
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+from typing import final
+
+from bot.services.scheduler import Scheduler
+from bot.handlers.script_handler import ScriptCommandHandler
+from bot.utils.messages import BotMessages
+
+logger = logging.getLogger(__name__)
+
+_APP_ACTIONS = ("start", "stop", "restart")
+_USAGE = (
+    "Uso:\n"
+    "`/schedule` - lista os agendamentos\n"
+    "`/schedule add [quando] [start|stop|restart] [app] [catchup]`\n"
+    "`/schedule add [quando] run [script] [catchup]`\n"
+    "`/schedule remove [id]`\n\n"
+    "`[quando]`: `HH:MM`, `@daily`, `@hourly`, `@weekly`, `@monthly` ou cron com 5 campos "
+    "(ex: `0 2 * * *`). `catchup` executa uma vez as execuções perdidas com o bot parado."
+)
+
+@final
+class ScheduleCommandHandler:
+    """Handlers para listar, adicionar e remover tarefas agendadas."""
+
+    def __init__(self, scheduler: Scheduler, script_handlers: ScriptCommandHandler):
+        self._scheduler = scheduler
+        self._scripts = script_handlers
+
+    async def schedule(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handler para o comando /schedule."""
+        args = context.args or []
+        subcommand = args[0].lower() if args else "list"
+
+        if subcommand == "list":
+            message = BotMessages.format_schedule_list(self._scheduler.entries())
+        elif subcommand == "add":
+            message = self._add(args[1:])
+        elif subcommand in ("remove", "rm", "del"):
+            message = self._remove(args[1:])
+        else:
+            message = _USAGE
+        await update.effective_chat.send_message(message, parse_mode='Markdown')
+
+    @staticmethod
+    def _split_spec(args: list[str]) -> tuple[str, list[str]]:
+        """Separa a expressão de agendamento (1 ou 5 tokens) do restante dos argumentos."""
+        if args and (args[0].startswith("@") or ":" in args[0]):
+            return args[0], args[1:]
+        return " ".join(args[:5]), args[5:]
+
+    def _add(self, args: list[str]) -> str:
+        spec, rest = self._split_spec(args)
+        if len(rest) not in (2, 3):
+            return _USAGE
+
+        action, target = rest[0].lower(), rest[1]
+        missed_policy = "run_once" if len(rest) == 3 and rest[2].lower() == "catchup" else "skip"
+        if len(rest) == 3 and missed_policy == "skip":
+            return _USAGE
+
+        if action == "run":
+            error = self._scripts.validate_script(target)
+            if error:
+                return BotMessages.format_error_message(error)
+        elif action in _APP_ACTIONS:
+            target = target.lower()
+        else:
+            return _USAGE
+
+        try:
+            entry = self._scheduler.add(spec, action, target, missed_policy)
+        except ValueError as e:
+            return BotMessages.format_error_message(str(e))
+
+        logger.info(f"Agendamento {entry.id} criado: '{entry.spec}' {entry.action} {entry.target}")
+        return BotMessages.format_success_message(
+            f"Agendamento `{entry.id}` criado: {BotMessages.format_schedule_entry(entry)}"
+        )
+
+    def _remove(self, args: list[str]) -> str:
+        if len(args) != 1 or not args[0].isdigit():
+            return _USAGE
+        entry_id = int(args[0])
+        if not self._scheduler.remove(entry_id):
+            return BotMessages.format_error_message(f"Agendamento `{entry_id}` não encontrado.")
+        logger.info(f"Agendamento {entry_id} removido.")
+        return BotMessages.format_success_message(f"Agendamento `{entry_id}` removido.")
@@ -1,10 +1,15 @@
 import os
+import time
 import asyncio
+import threading
 import logging
-from telegram import Update
+from telegram import Bot, Update
 from telegram.ext import ContextTypes
-from typing import final
+from typing import Optional, final
 
+from bot.services.audit_log import AuditEntry, AuditLog, actor_for
+from bot.services.concurrency import TaskLane
+from bot.services.sandbox import ProfileRegistry, ScriptResult, run_sandboxed
 from bot.utils.messages import BotMessages
 
 logger = logging.getLogger(__name__)
@@ -13,10 +18,21 @@ logger = logging.getLogger(__name__)
 class ScriptCommandHandler:
     """Handlers para listar e executar scripts seguros."""
 
-    def __init__(self, scripts_path: str):
+    def __init__(self, scripts_path: str, lane: TaskLane, audit: AuditLog, profiles_path: Optional[str] = None):
+        self._lane = lane
+        self._audit = audit
+        self.reconfigure(scripts_path, profiles_path)
+
+    def reconfigure(self, scripts_path: str, profiles_path: Optional[str] = None) -> None:
+        """
+        Troca o diretório de scripts e o arquivo de perfis.
+
+        Scripts já em execução terminam com o caminho e o perfil com que começaram.
+        """
         if not os.path.isdir(scripts_path):
             raise FileNotFoundError(f"O diretório de scripts '{scripts_path}' não existe.")
-        self._scripts_path = scripts_path
+        profiles = ProfileRegistry(profiles_path or os.path.join(scripts_path, "profiles.json"))
+        self._scripts_path, self._profiles = scripts_path, profiles
 
     def _get_executable_scripts(self) -> list[str]:
         """Retorna uma lista de nomes de arquivos executáveis no diretório de scripts."""
@@ -36,6 +52,14 @@ class ScriptCommandHandler:
         message = BotMessages.format_scripts_list(scripts)
         await update.effective_chat.send_message(message, parse_mode='Markdown')
 
+    def validate_script(self, script_name: str) -> Optional[str]:
+        """Valida o nome do script; retorna a mensagem de erro, ou None se for executável."""
+        if '..' in script_name or '/' in script_name:
+            return "Nome de script inválido. Apenas nomes de arquivos são permitidos."
+        if script_name not in self._get_executable_scripts():
+            return f"Script `{script_name}` não encontrado ou não é executável."
+        return None
+
     async def run_script(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handler para o comando /run."""
         if not context.args:
@@ -43,41 +67,93 @@ class ScriptCommandHandler:
             return
 
         script_name = context.args[0]
-        if '..' in script_name or '/' in script_name:
-            await update.effective_chat.send_message("Nome de script inválido. Apenas nomes de arquivos são permitidos.")
+        error = self.validate_script(script_name)
+        if error:
+            await update.effective_chat.send_message(error, parse_mode='Markdown')
             return
 
-        executable_scripts = self._get_executable_scripts()
-        if script_name not in executable_scripts:
-            await update.effective_chat.send_message(f"Script `{script_name}` não encontrado ou não é executável.", parse_mode='Markdown')
-            return
+        if self._lane.saturated:
+            await update.effective_chat.send_message(
+                BotMessages.format_loading_message(f"`{script_name}` aguardando vaga na fila de scripts"),
+                parse_mode='Markdown'
+            )
+        self.submit_script(context.bot, update.effective_chat.id, script_name, actor_for(update))
+
+    def submit_script(self, bot: Bot, chat_id: int, script_name: str, actor: str) -> asyncio.Task:
+        """Enfileira a execução na fila de scripts, sem bloquear o processamento de updates."""
+        return self._lane.submit(
+            self.execute_script(bot, chat_id, script_name, actor), name=f"script:{script_name}"
+        )
+
+    @staticmethod
+    def _result_details(result: ScriptResult) -> dict:
+        """Código de saída e consumo de recursos de uma execução, para a auditoria."""
+        details = {"returncode": result.returncode, "truncated": result.truncated}
+        if result.signal_name:
+            details["signal"] = result.signal_name
+        if result.rusage is not None:
+            details["cpu_user"] = round(result.rusage.ru_utime, 3)
+            details["cpu_sys"] = round(result.rusage.ru_stime, 3)
+            details["max_rss_kib"] = result.rusage.ru_maxrss
+        return details
 
-        full_path = os.path.join(self._scripts_path, script_name)
+    async def execute_script(self, bot: Bot, chat_id: int, script_name: str, actor: str) -> None:
+        """Executa um script já validado no sandbox e envia o resultado para o chat."""
+        scripts_path = self._scripts_path
+        full_path = os.path.join(scripts_path, script_name)
+        profile = self._profiles.get(script_name)
         
-        await update.effective_chat.send_message(f"Executando `{script_name}`...", parse_mode='Markdown')
+        await bot.send_message(chat_id, f"Executando `{script_name}`...", parse_mode='Markdown')
 
+        started = time.monotonic()
+        outcome, details = "cancelled", {}
+        cancel = threading.Event()
+        sandbox = asyncio.ensure_future(asyncio.to_thread(
+            run_sandboxed, [full_path], profile, scripts_path, cancel
+        ))
         try:
-            proc = await asyncio.wait_for(
-                asyncio.create_subprocess_exec(
-                    full_path,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                ),
-                timeout=300.0  # Timeout de 5 minutos
-            )
+            try:
+                result = await asyncio.shield(sandbox)
+            except asyncio.CancelledError:
+                # Cancelar a espera não para a thread nem o script: encerra o grupo
+                # de processos e aguarda a thread antes de registrar o resultado.
+                cancel.set()
+                details = self._result_details(await sandbox)
+                raise
+            usage = BotMessages.format_script_usage(result.elapsed, result.rusage)
+            outcome = "timeout" if result.timed_out else "ok" if result.returncode == 0 else "failed"
+            details = self._result_details(result)
 
-            stdout, stderr = await proc.communicate()
-            
-            message = BotMessages.format_script_output(
-                script_name,
-                stdout.decode('utf-8', errors='replace'),
-                stderr.decode('utf-8', errors='replace'),
-                proc.returncode
-            )
-            await update.effective_chat.send_message(message, parse_mode='Markdown')
+            if result.timed_out:
+                logger.warning(f"Script '{script_name}' excedeu o timeout de {profile.timeout:.0f}s e foi encerrado.")
+                message = (
+                    f"Timeout! O script `{script_name}` demorou mais de {profile.timeout:.0f}s "
+                    f"e foi encerrado junto com seus subprocessos.\n{usage}"
+                )
+            else:
+                message = BotMessages.format_script_output(
+                    script_name,
+                    result.stdout.decode('utf-8', errors='replace'),
+                    result.stderr.decode('utf-8', errors='replace'),
+                    result.returncode,
+                    usage=usage,
+                    signal_name=result.signal_name,
+                    truncated=result.truncated,
+                )
+            await bot.send_message(chat_id, message, parse_mode='Markdown')
 
-        except asyncio.TimeoutError:
-            await update.effective_chat.send_message(f"Timeout! O script `{script_name}` demorou mais de 5 minutos para executar.", parse_mode='Markdown')
         except Exception as e:
             logger.error(f"Falha ao executar o script '{script_name}': {e}", exc_info=True)
-            await update.effective_chat.send_message(f"Ocorreu um erro crítico ao executar o script `{script_name}`.", parse_mode='Markdown')
\ No newline at end of file
+            if outcome == "cancelled":  # O erro ocorreu antes de o script terminar
+                outcome, details = "error", {"error": str(e)}
+            await bot.send_message(chat_id, f"Ocorreu um erro crítico ao executar o script `{script_name}`.", parse_mode='Markdown')
+        finally:
+            self._audit.record(AuditEntry(
+                event="script",
+                actor=actor,
+                action="run",
+                target=script_name,
+                outcome=outcome,
+                duration=round(time.monotonic() - started, 2),
+                details=details,
+            ))
@@ -1,10 +1,12 @@
 import logging
 from functools import wraps
-from typing import Callable, final, Any
+from typing import Callable, final, Any, Optional
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from bot.services.audit_log import AuditEntry, AuditLog, actor_for
+
 logger = logging.getLogger(__name__)
 
 @final
@@ -12,10 +14,20 @@ class AuthMiddleware:
     """
     Middleware que funciona como um decorador para restringir o acesso a um chat_id específico.
     """
-    def __init__(self, allowed_chat_id: int):
-        self._allowed_chat_id = allowed_chat_id
-        if not isinstance(self._allowed_chat_id, int):
+    def __init__(self, allowed_chat_id: int, audit: Optional[AuditLog] = None):
+        self.allowed_chat_id = allowed_chat_id
+        self._audit = audit
+
+    @property
+    def allowed_chat_id(self) -> int:
+        """Chat autorizado; pode ser trocado em tempo de execução (recarga da configuração)."""
+        return self._allowed_chat_id
+
+    @allowed_chat_id.setter
+    def allowed_chat_id(self, chat_id: int) -> None:
+        if not isinstance(chat_id, int):
             raise TypeError("allowed_chat_id deve ser um inteiro.")
+        self._allowed_chat_id = chat_id
 
     def __call__(self, func: Callable) -> Callable:
         """Permite que a instância da classe seja usada como um decorador."""
@@ -26,8 +38,23 @@ class AuthMiddleware:
 
             if update.effective_chat.id != self._allowed_chat_id:
                 logger.warning(f"Acesso negado para o chat_id: {update.effective_chat.id}")
+                if self._audit is not None:
+                    self._audit.record(AuditEntry(
+                        event="denied",
+                        actor=actor_for(update),
+                        action=self._command_of(update),
+                        outcome="denied",
+                        details={"chat_id": update.effective_chat.id},
+                    ))
                 await update.effective_chat.send_message("⛔ Acesso negado. Este bot é privado.")
                 return None
             
             return await func(update, context, *args, **kwargs)
-        return wrapped
\ No newline at end of file
+        return wrapped
+
+    @staticmethod
+    def _command_of(update: Update) -> str:
+        """Comando (ou início do texto) tentado, sem os argumentos, que podem conter dados sensíveis."""
+        text = update.effective_message.text if update.effective_message else None
+        words = text.split() if text else []
+        return words[0][:32] if words else "?"
@@ -0,0 +1,86 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional, final
+
+from bot.services.concurrency import drain_tasks
+
+@dataclass
+class InFlightAction:
+    """Ação de ciclo de vida em andamento e as mensagens que a acompanham."""
+    app_id: str
+    action: str
+    actor: Optional[str] = None  # Quem pediu a ação, para a auditoria
+    started_at: float = field(default_factory=time.monotonic)
+    # (chat_id, message_id) -> último texto enviado, para evitar edições repetidas
+    targets: dict[tuple[int, int], Optional[str]] = field(default_factory=dict)
+    task: Optional[asyncio.Task] = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def attach(self, chat_id: int, message_id: int) -> None:
+        """Inscreve mais uma mensagem para receber o progresso desta ação."""
+        self.targets.setdefault((chat_id, message_id), None)
+
+@final
+class ActionRegistry:
+    """
+    Serializa ações por app e registra as que ainda estão em andamento.
+
+    Pedidos repetidos para um app com ação pendente devem se anexar à ação
+    existente em vez de disparar novas chamadas à API.
+    """
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._lock_users: dict[str, int] = {}
+        self._in_flight: dict[str, InFlightAction] = {}
+
+    @asynccontextmanager
+    async def lock(self, app_id: str) -> AsyncIterator[None]:
+        """
+        Protege a decisão e o registro de ações de um app.
+
+        O lock é descartado quando ninguém mais o usa, para que textos quaisquer
+        (nomes errados, apps inexistentes) não acumulem locks.
+        """
+        lock = self._locks.get(app_id)
+        if lock is None:
+            lock = self._locks[app_id] = asyncio.Lock()
+        self._lock_users[app_id] = self._lock_users.get(app_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_users[app_id] -= 1
+            if not self._lock_users[app_id]:
+                del self._lock_users[app_id]
+                del self._locks[app_id]
+
+    def get(self, app_id: str) -> Optional[InFlightAction]:
+        """Retorna a ação em andamento para o app, se houver."""
+        return self._in_flight.get(app_id)
+
+    def begin(self, app_id: str, action: str, actor: Optional[str] = None) -> InFlightAction:
+        """Registra uma nova ação; deve ser chamado com o lock do app adquirido."""
+        if app_id in self._in_flight:
+            raise RuntimeError(f"Já existe uma ação em andamento para o app '{app_id}'.")
+        operation = self._in_flight[app_id] = InFlightAction(app_id=app_id, action=action, actor=actor)
+        return operation
+
+    def finish(self, operation: InFlightAction) -> None:
+        """Remove a ação do registro ao terminar."""
+        if self._in_flight.get(operation.app_id) is operation:
+            del self._in_flight[operation.app_id]
+
+    def pending(self) -> list[InFlightAction]:
+        """Lista as ações ainda em andamento."""
+        return list(self._in_flight.values())
+
+    async def drain(self, timeout: float) -> int:
+        """Aguarda as ações em andamento; retorna quantas foram canceladas no timeout."""
+        return await drain_tasks(
+            (operation.task for operation in self.pending() if operation.task is not None), timeout
+        )
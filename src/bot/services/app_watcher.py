@@ -0,0 +1,211 @@
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, final
+
+from api.runtipi import RuntipiAPI, AppStatus
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[AppStatus, float], Awaitable[None]]
+
+# Status intermediários: o app ainda está a caminho de um estado estável.
+TRANSITIONAL_STATUSES = frozenset({
+    AppStatus.STARTING,
+    AppStatus.STOPPING,
+    AppStatus.RESTARTING,
+    AppStatus.INSTALLING,
+    AppStatus.UNINSTALLING,
+    AppStatus.UPDATING,
+    AppStatus.RESETTING,
+    AppStatus.BACKING_UP,
+    AppStatus.RESTORING,
+})
+
+@dataclass
+class WatchResult:
+    """Resultado do acompanhamento de um app até o status alvo."""
+    app_id: str
+    target: AppStatus
+    status: AppStatus
+    elapsed: float
+    reached: bool = False
+    timed_out: bool = False
+
+@dataclass
+class _Watch:
+    app_id: str
+    target: AppStatus
+    started_at: float
+    deadline: float
+    future: asyncio.Future
+    on_progress: Optional[ProgressCallback] = None
+    status: AppStatus = AppStatus.UNKNOWN
+    seen_transition: bool = False
+
+@final
+class AppStateWatcher:
+    """
+    Acompanha apps após ações de ciclo de vida até atingirem o status alvo.
+
+    Todos os acompanhamentos ativos compartilham um único loop de polling de
+    /api/apps/installed, com backoff adaptativo: o intervalo volta ao mínimo
+    quando algum status muda e cresce enquanto nada muda.
+    """
+    MIN_INTERVAL = 1.0
+    MAX_INTERVAL = 10.0
+    BACKOFF_FACTOR = 1.5
+
+    def __init__(self, runtipi_api: RuntipiAPI, timeout: float = 120.0):
+        self._api = runtipi_api
+        self._timeout = timeout
+        self._watches: dict[str, list[_Watch]] = {}
+        self._interval = self.MIN_INTERVAL
+        self._wakeup = asyncio.Event()
+        self._poll_task: Optional[asyncio.Task] = None
+
+    @property
+    def timeout(self) -> float:
+        """Timeout padrão; alterá-lo não afeta os acompanhamentos já iniciados."""
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value: float) -> None:
+        self._timeout = value
+
+    async def wait_for(
+        self,
+        app_id: str,
+        target: AppStatus,
+        on_progress: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
+    ) -> WatchResult:
+        """
+        Aguarda até que o app atinja `target`, falhe ou estoure o timeout.
+
+        Args:
+            app_id (str): ID do app acompanhado.
+            target (AppStatus): Status esperado ao fim da ação.
+            on_progress (Optional[ProgressCallback]): Chamado a cada polling com o status e o tempo decorrido.
+            timeout (Optional[float]): Tempo máximo em segundos (padrão do watcher se omitido).
+        """
+        now = time.monotonic()
+        watch = _Watch(
+            app_id=app_id,
+            target=target,
+            started_at=now,
+            deadline=now + (timeout or self._timeout),
+            future=asyncio.get_running_loop().create_future(),
+            on_progress=on_progress,
+        )
+        self._watches.setdefault(app_id, []).append(watch)
+
+        self._interval = self.MIN_INTERVAL
+        self._wakeup.set()
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = asyncio.create_task(self._poll_loop())
+
+        return await watch.future
+
+    async def close(self) -> None:
+        """Cancela os acompanhamentos pendentes e encerra o loop de polling."""
+        for watches in self._watches.values():
+            for watch in watches:
+                if not watch.future.done():
+                    watch.future.cancel()
+        # Sem acompanhamentos, o loop termina sozinho ao ser acordado.
+        self._watches.clear()
+        self._wakeup.set()
+        if self._poll_task is not None:
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+
+    def _next_delay(self) -> float:
+        """Intervalo até o próximo polling, sem ultrapassar o deadline mais próximo."""
+        nearest_deadline = min(
+            watch.deadline for watches in self._watches.values() for watch in watches
+        )
+        return max(0.1, min(self._interval, nearest_deadline - time.monotonic()))
+
+    async def _poll_loop(self) -> None:
+        """Loop único de polling compartilhado por todos os acompanhamentos."""
+        while self._watches:
+            self._wakeup.clear()
+            try:
+                # Um novo acompanhamento reinicia a espera com o intervalo mínimo.
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._next_delay())
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                apps = await asyncio.to_thread(self._api.fetch_installed_apps)
+            except Exception as e:
+                logger.error(f"Erro ao consultar status dos apps: {e}", exc_info=True)
+                apps = []
+
+            statuses = {app.id: app.status for app in apps}
+            if await self._dispatch(statuses):
+                self._interval = self.MIN_INTERVAL
+            else:
+                self._interval = min(self._interval * self.BACKOFF_FACTOR, self.MAX_INTERVAL)
+
+    async def _dispatch(self, statuses: dict[str, AppStatus]) -> bool:
+        """Atualiza cada acompanhamento com o polling mais recente."""
+        now = time.monotonic()
+        changed = False
+        finished = False
+        callbacks = []
+
+        for app_id in list(self._watches):
+            pending = []
+            for watch in self._watches[app_id]:
+                status = statuses.get(app_id, AppStatus.UNKNOWN)
+                if status != watch.status:
+                    changed = True
+                watch.status = status
+                if status in TRANSITIONAL_STATUSES:
+                    watch.seen_transition = True
+
+                elapsed = now - watch.started_at
+                if status == watch.target:
+                    self._finish(watch, WatchResult(app_id, watch.target, status, elapsed, reached=True))
+                elif watch.seen_transition and status not in TRANSITIONAL_STATUSES and status != AppStatus.UNKNOWN:
+                    # Passou por um estado intermediário e estabilizou fora do alvo: falhou.
+                    self._finish(watch, WatchResult(app_id, watch.target, status, elapsed))
+                elif now >= watch.deadline:
+                    self._finish(watch, WatchResult(app_id, watch.target, status, elapsed, timed_out=True))
+                else:
+                    pending.append(watch)
+                    if watch.on_progress is not None:
+                        callbacks.append(self._notify(watch, status, elapsed))
+                    continue
+                finished = True
+
+            if pending:
+                self._watches[app_id] = pending
+            else:
+                del self._watches[app_id]
+
+        if finished:
+            # O cache de TTL ainda pode conter o status anterior à ação.
+            self._api.invalidate_apps_cache()
+        if callbacks:
+            await asyncio.gather(*callbacks)
+        return changed
+
+    @staticmethod
+    def _finish(watch: _Watch, result: WatchResult) -> None:
+        if not watch.future.done():
+            watch.future.set_result(result)
+
+    @staticmethod
+    async def _notify(watch: _Watch, status: AppStatus, elapsed: float) -> None:
+        try:
+            await watch.on_progress(status, elapsed)
+        except Exception as e:
+            logger.warning(f"Falha ao reportar progresso do app '{watch.app_id}': {e}")
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import queue
+import logging
+import dataclasses
+from collections import deque
+from itertools import islice
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Any, Optional, final
+
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+_TAIL_BLOCK = 64 * 1024
+
+@dataclasses.dataclass
+class AuditEntry:
+    """Registro de auditoria: quem fez o quê, em qual alvo e com qual resultado."""
+    event: str  # action | script | denied
+    actor: str  # @usuário, user:<id>, chat:<id> ou scheduler
+    action: str
+    target: Optional[str] = None
+    outcome: str = "ok"  # ok | failed | timeout | error | cancelled | denied
+    duration: Optional[float] = None
+    details: dict[str, Any] = dataclasses.field(default_factory=dict)
+    ts: float = dataclasses.field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'AuditEntry':
+        known = {f.name for f in dataclasses.fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+def actor_for(update: Update) -> str:
+    """Identifica quem enviou o update, para o registro de auditoria."""
+    user = update.effective_user
+    if user is not None:
+        return f"@{user.username}" if user.username else f"user:{user.id}"
+    return f"chat:{update.effective_chat.id}"
+
+@final
+class AuditLog:
+    """
+    Log de auditoria append-only em JSON lines, com rotação por tamanho.
+
+    A escrita acontece na thread de um QueueListener, então registrar nunca
+    bloqueia o event loop. As entradas recentes ficam em um índice em memória
+    (global e por alvo), usado pelo /history sem ler o arquivo; na abertura,
+    o índice é preenchido com o fim do log.
+    """
+    INDEX_SIZE = 500
+    PER_TARGET_SIZE = 50
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024, backup_count: int = 5):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._recent: deque[AuditEntry] = deque(maxlen=self.INDEX_SIZE)
+        self._by_target: dict[str, deque[AuditEntry]] = {}
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener: Optional[QueueListener] = None
+
+    def open(self) -> None:
+        """Carrega o fim do arquivo no índice e inicia a thread de escrita."""
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        loaded = 0
+        for line in self._tail(self.INDEX_SIZE):
+            try:
+                self._index(AuditEntry.from_dict(json.loads(line)))
+                loaded += 1
+            except (ValueError, TypeError):
+                logger.warning(f"Ignorando linha inválida no log de auditoria: {line[:80]!r}")
+        logger.info(f"{loaded} registro(s) de auditoria carregado(s) de '{self._path}'.")
+
+        handler = RotatingFileHandler(
+            self._path, maxBytes=self._max_bytes, backupCount=self._backup_count, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = QueueListener(self._queue, handler)
+        self._listener.start()
+
+    def close(self) -> None:
+        """Grava os registros pendentes e encerra a thread de escrita."""
+        if self._listener is None:
+            return
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        self._listener = None
+
+    def record(self, entry: AuditEntry) -> None:
+        """Indexa o registro e o enfileira para gravação, sem bloquear."""
+        self._index(entry)
+        line = json.dumps(entry.to_dict(), ensure_ascii=False, separators=(",", ":"), default=str)
+        self._queue.put_nowait(
+            logging.makeLogRecord({"msg": line, "levelno": logging.INFO, "levelname": "INFO"})
+        )
+
+    def recent(self, target: Optional[str] = None, limit: int = 10) -> list[AuditEntry]:
+        """Registros mais recentes primeiro, de todos os alvos ou apenas de `target`."""
+        source = self._recent if target is None else self._by_target.get(target, ())
+        return list(islice(reversed(source), limit))
+
+    def _index(self, entry: AuditEntry) -> None:
+        self._recent.append(entry)
+        if entry.target is not None:
+            per_target = self._by_target.get(entry.target)
+            if per_target is None:
+                per_target = self._by_target[entry.target] = deque(maxlen=self.PER_TARGET_SIZE)
+            per_target.append(entry)
+
+    def _tail(self, count: int) -> list[str]:
+        """Últimas `count` linhas do log, recorrendo ao arquivo rotacionado anterior se preciso."""
+        lines: list[str] = []
+        for path in (self._path, f"{self._path}.1"):
+            if len(lines) >= count:
+                break
+            lines = _tail_lines(path, count - len(lines)) + lines
+        return lines
+
+def _tail_lines(path: str, count: int) -> list[str]:
+    """Lê as últimas `count` linhas de um arquivo a partir do fim, em blocos."""
+    if count <= 0:
+        return []
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return []
+    with f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        # Uma quebra de linha a mais garante que a primeira linha lida está completa.
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(_TAIL_BLOCK, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    return [line for line in data.decode("utf-8", errors="replace").splitlines() if line][-count:]
@@ -0,0 +1,141 @@
+import sys
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Coroutine, Iterable, Optional, final
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from config.logging_setup import request_id_var
+
+logger = logging.getLogger(__name__)
+
+async def drain_tasks(tasks: Iterable[asyncio.Task], timeout: float) -> int:
+    """
+    Aguarda as tasks por até `timeout` segundos e cancela as que não terminarem.
+
+    Returns:
+        int: Quantas tasks precisaram ser canceladas.
+    """
+    tasks = {task for task in tasks if not task.done()}
+    if not tasks:
+        return 0
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    return len(pending)
+
+@final
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processa updates de forma concorrente, preservando a ordem dentro de cada chat.
+
+    Updates do mesmo chat são serializados por um lock FIFO, de modo que chats
+    diferentes não esperam uns pelos outros. Updates sem chat são processados
+    sem ordenação.
+
+    O limite global só é aplicado depois do lock do chat: updates aguardando a
+    vez no próprio chat não ocupam vagas, e uma rajada de um chat não bloqueia
+    os demais. Por isso o semáforo do BaseUpdateProcessor (tomado antes de
+    `do_process_update`) fica sem limite prático, e `max_concurrent_updates`
+    reporta esse valor em vez do limite real.
+
+    Cada update roda com seu ID em `request_id_var`, herdado pelas tasks que
+    os handlers criarem, para correlacionar os logs.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        if max_concurrent_updates < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+        super().__init__(sys.maxsize)
+        self._slots = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._chat_locks: dict[int, asyncio.Lock] = {}
+        self._chat_users: dict[int, int] = {}
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        if isinstance(update, Update):
+            request_id_var.set(f"u{update.update_id}")
+        started = time.perf_counter()
+        try:
+            await self._process_in_order(update, coroutine)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            logger.debug(
+                "Update processado em %.1f ms.", duration_ms,
+                extra={"duration_ms": round(duration_ms, 1)},
+            )
+
+    async def _process_in_order(self, update: object, coroutine: Awaitable[Any]) -> None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            async with self._slots:
+                await coroutine
+            return
+
+        lock = self._chat_locks.get(chat.id)
+        if lock is None:
+            lock = self._chat_locks[chat.id] = asyncio.Lock()
+        self._chat_users[chat.id] = self._chat_users.get(chat.id, 0) + 1
+        try:
+            async with lock, self._slots:
+                await coroutine
+        finally:
+            # Descarta o lock quando não há mais updates do chat, evitando acúmulo.
+            self._chat_users[chat.id] -= 1
+            if not self._chat_users[chat.id]:
+                del self._chat_users[chat.id]
+                del self._chat_locks[chat.id]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+@final
+class TaskLane:
+    """
+    Fila separada para tarefas longas, com limite próprio de concorrência.
+
+    Handlers submetem o trabalho demorado e retornam logo, liberando a ordem
+    do chat para os comandos rápidos que chegarem em seguida.
+    """
+
+    def __init__(self, name: str, limit: int):
+        if limit < 1:
+            raise ValueError("O limite de uma fila de tarefas deve ser maior que zero.")
+        self._name = name
+        self._limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def saturated(self) -> bool:
+        """Indica se uma nova tarefa teria que esperar por vaga."""
+        return len(self._tasks) >= self._limit
+
+    @property
+    def pending(self) -> int:
+        """Número de tarefas em execução ou aguardando vaga."""
+        return len(self._tasks)
+
+    def submit(self, coroutine: Coroutine[Any, Any, Any], name: Optional[str] = None) -> asyncio.Task:
+        """Agenda a corrotina na fila e retorna a task correspondente."""
+        task = asyncio.create_task(self._run(coroutine), name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def drain(self, timeout: float) -> int:
+        """Aguarda as tarefas em execução ou na fila; retorna quantas foram canceladas no timeout."""
+        return await drain_tasks(self._tasks, timeout)
+
+    async def _run(self, coroutine: Coroutine[Any, Any, Any]) -> Any:
+        async with self._semaphore:
+            try:
+                return await coroutine
+            except Exception as e:
+                logger.error("Erro em tarefa da fila '%s': %s", self._name, e, exc_info=True)
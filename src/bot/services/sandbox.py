@@ -0,0 +1,317 @@
+import os
+import json
+import time
+import shutil
+import signal
+import logging
+import resource
+import selectors
+import threading
+import subprocess
+import dataclasses
+from typing import Any, Optional, final
+
+logger = logging.getLogger(__name__)
+
+_SAFE_PATH = "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+_READ_CHUNK = 65536
+_TERM_GRACE = 2.0  # Segundos entre SIGTERM e SIGKILL no timeout
+_SELECT_POLL = 0.25  # Intervalo máximo entre verificações de prazo e cancelamento
+_WAIT_POLL = 0.1  # Intervalo de espera pelo fim do processo após o fechamento dos pipes
+
+@final
+@dataclasses.dataclass(frozen=True)
+class ExecutionProfile:
+    """
+    Limites de execução de um script.
+
+    Campos com valor None não aplicam o limite correspondente.
+    """
+    timeout: float = 300.0
+    cpu_seconds: Optional[int] = 300
+    address_space_mb: Optional[int] = 1024
+    open_files: Optional[int] = 256
+    output_bytes: int = 64 * 1024  # Por stream: stdout e stderr têm limites separados
+    nice: int = 10
+    ionice_class: Optional[int] = 2  # 1 = realtime, 2 = best-effort, 3 = idle
+    ionice_level: int = 7
+    pass_env: tuple[str, ...] = ()
+    env: tuple[tuple[str, str], ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict, base: Optional['ExecutionProfile'] = None) -> 'ExecutionProfile':
+        """
+        Cria um perfil a partir de um dicionário, herdando os campos omitidos de `base`.
+        Levanta um ValueError se houver campos desconhecidos ou inválidos.
+        """
+        base = base or cls()
+        known = {f.name for f in dataclasses.fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Campos de perfil desconhecidos: {', '.join(sorted(unknown))}")
+
+        values: dict[str, Any] = dict(data)
+        if "pass_env" in values:
+            pass_env = values["pass_env"]
+            if not isinstance(pass_env, list) or not all(isinstance(name, str) for name in pass_env):
+                raise ValueError("pass_env deve ser uma lista de nomes de variáveis")
+            values["pass_env"] = tuple(pass_env)
+        if "env" in values:
+            env = values["env"]
+            if not isinstance(env, dict) or not all(isinstance(value, str) for value in env.values()):
+                raise ValueError("env deve ser um objeto com valores do tipo texto")
+            values["env"] = tuple(sorted(env.items()))
+        profile = dataclasses.replace(base, **values)
+        if profile.timeout <= 0 or profile.output_bytes <= 0:
+            raise ValueError("timeout e output_bytes devem ser maiores que zero")
+        return profile
+
+    def build_env(self) -> dict[str, str]:
+        """Ambiente mínimo do script: PATH seguro, variáveis permitidas e extras do perfil."""
+        env = {"PATH": _SAFE_PATH, "HOME": "/tmp", "LANG": "C.UTF-8"}
+        env.update({name: os.environ[name] for name in self.pass_env if name in os.environ})
+        env.update(self.env)
+        return env
+
+    def rlimits(self) -> dict[str, int]:
+        """Limites do perfil por opção do `prlimit`, sem ultrapassar os limites rígidos atuais."""
+        limits = (
+            ("cpu", resource.RLIMIT_CPU, self.cpu_seconds),
+            ("as", resource.RLIMIT_AS, self.address_space_mb * 1024 * 1024 if self.address_space_mb else None),
+            ("nofile", resource.RLIMIT_NOFILE, self.open_files),
+        )
+        values = {}
+        for option, limit, value in limits:
+            if value is None:
+                continue
+            _, hard = resource.getrlimit(limit)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            values[option] = value
+        return values
+
+@dataclasses.dataclass
+class ScriptResult:
+    """Resultado de uma execução no sandbox, com o consumo de recursos."""
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+    elapsed: float
+    rusage: Optional[resource.struct_rusage] = None
+    timed_out: bool = False
+    truncated: bool = False
+    cancelled: bool = False
+
+    @property
+    def signal_name(self) -> Optional[str]:
+        """Nome do sinal que encerrou o processo, se houver."""
+        if self.returncode >= 0:
+            return None
+        try:
+            return signal.Signals(-self.returncode).name
+        except ValueError:
+            return f"sinal {-self.returncode}"
+
+@final
+class ProfileRegistry:
+    """
+    Perfis de execução por script, lidos de um arquivo JSON opcional.
+
+    O arquivo é relido quando modificado, sem reiniciar o bot. Formato:
+    `{"default": {...}, "backup.sh": {"timeout": 1800, "cpu_seconds": 1200}}`.
+    """
+    def __init__(self, path: str):
+        self._path = path
+        self._mtime: Optional[float] = None
+        self._profiles: dict[str, ExecutionProfile] = {}
+        self._default = ExecutionProfile()
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.path.getmtime(self._path)
+        except OSError:
+            self._mtime, self._profiles, self._default = None, {}, ExecutionProfile()
+            return
+        if mtime == self._mtime:
+            return
+
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                raw = json.load(f)
+            default = ExecutionProfile.from_dict(raw.get("default", {}))
+            profiles = {
+                name: ExecutionProfile.from_dict(data, default)
+                for name, data in raw.items() if name != "default"
+            }
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Perfis de execução inválidos em '{self._path}': {e}. Mantendo os anteriores.")
+            self._mtime = mtime
+            return
+
+        self._mtime, self._profiles, self._default = mtime, profiles, default
+        logger.info(f"{len(profiles)} perfil(is) de execução carregado(s) de '{self._path}'.")
+
+    def get(self, script_name: str) -> ExecutionProfile:
+        """Retorna o perfil do script, ou o perfil padrão."""
+        self._reload_if_changed()
+        return self._profiles.get(script_name, self._default)
+
+def _limits_prefix(profile: ExecutionProfile) -> list[str]:
+    """
+    Prefixo `nice`/`prlimit` para o comando, se disponíveis no sistema.
+
+    Os limites são aplicados por comandos no início da linha de execução, e não
+    via `preexec_fn`, que não é seguro com outras threads ativas no processo.
+    """
+    prefix = []
+    if profile.nice:
+        nice = shutil.which("nice")
+        if nice is None:
+            logger.debug("nice não encontrado; prioridade de CPU não aplicada.")
+        else:
+            prefix += [nice, "-n", str(profile.nice)]
+    rlimits = profile.rlimits()
+    if rlimits:
+        prlimit = shutil.which("prlimit")
+        if prlimit is None:
+            logger.warning("prlimit não encontrado; limites de CPU, memória e arquivos não aplicados.")
+        else:
+            prefix += [prlimit] + [f"--{option}={value}:{value}" for option, value in rlimits.items()] + ["--"]
+    return prefix
+
+def _ionice_prefix(profile: ExecutionProfile) -> list[str]:
+    """Prefixo `ionice` para o comando, se disponível no sistema."""
+    if profile.ionice_class is None:
+        return []
+    ionice = shutil.which("ionice")
+    if ionice is None:
+        logger.debug("ionice não encontrado; prioridade de I/O não aplicada.")
+        return []
+    prefix = [ionice, "-c", str(profile.ionice_class)]
+    if profile.ionice_class in (1, 2):
+        prefix += ["-n", str(profile.ionice_level)]
+    return prefix
+
+class _Deadline:
+    """
+    Timeout de um grupo de processos: SIGTERM no prazo e SIGKILL após a tolerância.
+
+    Um `cancel` sinalizado antecipa o prazo para o momento atual.
+    """
+
+    def __init__(self, pgid: int, timeout: float, cancel: Optional[threading.Event] = None):
+        self._pgid = pgid
+        self._deadline = time.monotonic() + timeout
+        self._cancel = cancel
+        self.kill_at: Optional[float] = None
+        self.cancelled = False
+
+    @property
+    def expired(self) -> bool:
+        """Indica se o grupo já começou a ser encerrado (timeout ou cancelamento)."""
+        return self.kill_at is not None
+
+    def check(self, now: float) -> None:
+        """Envia o sinal devido ao grupo, se o prazo ou a tolerância tiverem passado."""
+        if self.kill_at is None:
+            if self._cancel is not None and self._cancel.is_set():
+                self.cancelled = True
+            elif now < self._deadline:
+                return
+            self.kill_at = now + _TERM_GRACE
+            _signal_group(self._pgid, signal.SIGTERM)
+        elif now >= self.kill_at:
+            _signal_group(self._pgid, signal.SIGKILL)
+
+    def remaining(self, now: float) -> float:
+        """Tempo até o próximo sinal."""
+        return (self.kill_at if self.kill_at is not None else self._deadline) - now
+
+def run_sandboxed(
+    argv: list[str],
+    profile: ExecutionProfile,
+    cwd: Optional[str] = None,
+    cancel: Optional[threading.Event] = None,
+) -> ScriptResult:
+    """
+    Executa um comando com os limites do perfil, bloqueando até o fim.
+
+    Deve rodar fora do event loop (ex.: `asyncio.to_thread`). O processo é
+    líder de um novo grupo; no timeout o grupo inteiro recebe SIGTERM e, após
+    uma tolerância, SIGKILL. O prazo vale também depois que o script fecha
+    stdout/stderr. Sinalizar `cancel` encerra o grupo da mesma forma, sem
+    esperar o prazo. O consumo de recursos vem de `os.wait4`.
+    """
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        _ionice_prefix(profile) + _limits_prefix(profile) + argv,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        env=profile.build_env(),
+        start_new_session=True,
+    )
+
+    buffers = {proc.stdout.fileno(): bytearray(), proc.stderr.fileno(): bytearray()}
+    # Limites separados: um stdout volumoso não consome o espaço dos erros.
+    remaining_output = dict.fromkeys(buffers, profile.output_bytes)
+    truncated = False
+    deadline = _Deadline(proc.pid, profile.timeout, cancel)
+
+    with selectors.DefaultSelector() as selector:
+        selector.register(proc.stdout, selectors.EVENT_READ)
+        selector.register(proc.stderr, selectors.EVENT_READ)
+
+        while selector.get_map():
+            now = time.monotonic()
+            deadline.check(now)
+            if deadline.expired and now >= deadline.kill_at + _TERM_GRACE:
+                break  # Algum processo escapou do grupo mantendo os pipes abertos
+            for key, _ in selector.select(timeout=max(0.05, min(deadline.remaining(now), _SELECT_POLL))):
+                chunk = os.read(key.fd, _READ_CHUNK)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    continue
+                # Acima do limite a saída continua sendo lida (para não travar o
+                # script em um pipe cheio), mas é descartada.
+                remaining = remaining_output[key.fd]
+                if len(chunk) <= remaining:
+                    buffers[key.fd] += chunk
+                    remaining_output[key.fd] -= len(chunk)
+                else:
+                    buffers[key.fd] += chunk[:remaining]
+                    remaining_output[key.fd] = 0
+                    truncated = True
+
+    # Com os pipes fechados (ex.: `exec >log 2>&1`), o prazo segue valendo até o processo terminar.
+    while True:
+        pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        now = time.monotonic()
+        deadline.check(now)
+        time.sleep(max(0.01, min(deadline.remaining(now), _WAIT_POLL)))
+    if deadline.expired:
+        _signal_group(proc.pid, signal.SIGKILL)  # Restos do grupo após a saída do líder
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    stdout, stderr = bytes(buffers[proc.stdout.fileno()]), bytes(buffers[proc.stderr.fileno()])
+    proc.stdout.close()
+    proc.stderr.close()
+
+    return ScriptResult(
+        returncode=proc.returncode,
+        stdout=stdout,
+        stderr=stderr,
+        elapsed=time.monotonic() - started,
+        rusage=rusage,
+        timed_out=deadline.expired and not deadline.cancelled,
+        truncated=truncated,
+        cancelled=deadline.cancelled,
+    )
+
+def _signal_group(pgid: int, sig: signal.Signals) -> None:
+    try:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
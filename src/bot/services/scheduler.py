@@ -0,0 +1,306 @@
+import os
+import re
+import json
+import time
+import heapq
+import asyncio
+import logging
+import dataclasses
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, final
+
+logger = logging.getLogger(__name__)
+
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+_TIME_OF_DAY = re.compile(r"^([01]?\d|2[0-3]):([0-5]\d)$")
+
+# (mínimo, máximo) de cada campo: minuto, hora, dia do mês, mês, dia da semana.
+_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+MISSED_POLICIES = ("skip", "run_once")
+
+@final
+@dataclasses.dataclass(frozen=True)
+class CronSpec:
+    """Expressão no estilo cron (5 campos), `@daily`/`@hourly`/... ou `HH:MM` diário."""
+    expression: str
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]  # 0 = domingo
+    days_restricted: bool
+    weekdays_restricted: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> 'CronSpec':
+        """
+        Converte uma expressão em CronSpec.
+        Levanta um ValueError se a expressão for inválida.
+        """
+        expression = expression.strip()
+        normalized = _ALIASES.get(expression.lower())
+        if normalized is None:
+            match = _TIME_OF_DAY.match(expression)
+            normalized = f"{int(match[2])} {int(match[1])} * * *" if match else expression
+
+        fields = normalized.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expressão de agendamento inválida: '{expression}'")
+
+        minutes, hours, days, months, weekdays = (
+            cls._parse_field(value, low, high) for value, (low, high) in zip(fields, _FIELD_RANGES)
+        )
+        return cls(
+            expression=expression,
+            minutes=minutes,
+            hours=hours,
+            days=days,
+            months=months,
+            weekdays=frozenset(day % 7 for day in weekdays),
+            days_restricted=fields[2] != "*",
+            weekdays_restricted=fields[4] != "*",
+        )
+
+    @staticmethod
+    def _parse_field(value: str, low: int, high: int) -> frozenset[int]:
+        """Converte um campo (`*`, `5`, `1-5`, `*/15`, `1,3,5`) no conjunto de valores."""
+        values: set[int] = set()
+        try:
+            for part in value.split(","):
+                base, _, step_str = part.partition("/")
+                step = int(step_str) if step_str else 1
+                if base == "*":
+                    start, end = low, high
+                elif "-" in base:
+                    start, end = (int(bound) for bound in base.split("-", 1))
+                else:
+                    start = int(base)
+                    end = high if step_str else start
+                if step <= 0 or not (low <= start <= end <= high):
+                    raise ValueError
+                values.update(range(start, end + 1, step))
+        except ValueError:
+            raise ValueError(f"Campo de agendamento inválido: '{value}'") from None
+        return frozenset(values)
+
+    def _matches_day(self, moment: datetime) -> bool:
+        weekday = (moment.weekday() + 1) % 7
+        day_ok = moment.day in self.days
+        weekday_ok = weekday in self.weekdays
+        # Como no cron: se ambos estiverem restritos, basta um deles coincidir.
+        if self.days_restricted and self.weekdays_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Retorna o próximo horário (com precisão de minuto) estritamente após `moment`."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                month_start = candidate.replace(day=1, hour=0, minute=0)
+                candidate = (month_start + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._matches_day(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Expressão de agendamento nunca é satisfeita: '{self.expression}'")
+
+@dataclasses.dataclass
+class ScheduleEntry:
+    """Tarefa agendada: uma ação em um app ou a execução de um script."""
+    id: int
+    spec: str
+    action: str  # start | stop | restart | run
+    target: str
+    missed_policy: str = "skip"
+    created_at: float = dataclasses.field(default_factory=time.time)
+    last_run: Optional[float] = None
+    next_run: Optional[float] = dataclasses.field(default=None, compare=False)
+
+    @property
+    def kind(self) -> str:
+        return "script" if self.action == "run" else "app"
+
+    def to_dict(self) -> dict:
+        data = dataclasses.asdict(self)
+        data.pop("next_run")
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ScheduleEntry':
+        fields = {f.name for f in dataclasses.fields(cls)} - {"next_run"}
+        return cls(**{key: value for key, value in data.items() if key in fields})
+
+ScheduleRunner = Callable[[ScheduleEntry], Awaitable[None]]
+
+@final
+class Scheduler:
+    """
+    Agendador assíncrono baseado em um heap de timers, persistido em JSON.
+
+    O loop dorme até o próximo disparo (ou até o heap mudar) em vez de
+    verificar periodicamente. Execuções perdidas (bot parado, host suspenso)
+    seguem a política de cada tarefa: `skip` descarta, `run_once` executa uma
+    única vez assim que possível.
+    """
+    MISFIRE_GRACE = 60.0  # Atraso tolerado antes de considerar uma execução perdida
+
+    def __init__(self, path: str, runner: ScheduleRunner):
+        self._path = Path(path)
+        self._runner = runner
+        self._entries: dict[int, ScheduleEntry] = {}
+        self._heap: list[tuple[float, int]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._running: set[asyncio.Task] = set()
+
+    def load(self) -> None:
+        """Carrega as tarefas do disco e calcula o próximo disparo de cada uma."""
+        if not self._path.exists():
+            return
+        try:
+            with self._path.open(encoding="utf-8") as f:
+                raw_entries = json.load(f)
+            entries = [ScheduleEntry.from_dict(data) for data in raw_entries]
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Não foi possível carregar os agendamentos de '{self._path}': {e}")
+            return
+
+        now = time.time()
+        for entry in entries:
+            try:
+                spec = CronSpec.parse(entry.spec)
+            except ValueError as e:
+                logger.error(f"Ignorando agendamento {entry.id}: {e}")
+                continue
+            self._entries[entry.id] = entry
+            reference = entry.last_run or entry.created_at
+            due = spec.next_after(datetime.fromtimestamp(reference)).timestamp()
+            if due <= now - self.MISFIRE_GRACE and entry.missed_policy == "skip":
+                logger.info(f"Agendamento {entry.id} perdeu execuções enquanto o bot estava parado; ignorando.")
+                due = spec.next_after(datetime.fromtimestamp(now)).timestamp()
+            self._push(entry, due)
+        logger.info(f"{len(self._entries)} agendamento(s) carregado(s).")
+
+    def _save(self) -> None:
+        """Grava as tarefas de forma atômica (arquivo temporário + rename)."""
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump([entry.to_dict() for entry in self._entries.values()], f, indent=2)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.error(f"Não foi possível salvar os agendamentos em '{self._path}': {e}")
+
+    def entries(self) -> list[ScheduleEntry]:
+        """Lista as tarefas ordenadas pelo próximo disparo."""
+        return sorted(self._entries.values(), key=lambda entry: entry.next_run or float("inf"))
+
+    def add(self, spec: str, action: str, target: str, missed_policy: str = "skip") -> ScheduleEntry:
+        """
+        Adiciona e persiste uma nova tarefa.
+        Levanta um ValueError se a expressão ou a política forem inválidas.
+        """
+        cron = CronSpec.parse(spec)
+        if missed_policy not in MISSED_POLICIES:
+            raise ValueError(f"Política de execução perdida inválida: '{missed_policy}'")
+        entry = ScheduleEntry(
+            id=max(self._entries, default=0) + 1,
+            spec=cron.expression,
+            action=action,
+            target=target,
+            missed_policy=missed_policy,
+        )
+        self._entries[entry.id] = entry
+        self._push(entry, cron.next_after(datetime.now()).timestamp())
+        self._save()
+        return entry
+
+    def remove(self, entry_id: int) -> bool:
+        """Remove uma tarefa; as entradas dela no heap são descartadas ao saírem do topo."""
+        if self._entries.pop(entry_id, None) is None:
+            return False
+        self._save()
+        self._wakeup.set()
+        return True
+
+    def _push(self, entry: ScheduleEntry, due: float) -> None:
+        entry.next_run = due
+        heapq.heappush(self._heap, (due, entry.id))
+        if self._heap[0] == (due, entry.id):
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Inicia o loop do agendador."""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Encerra o loop do agendador, aguardando as execuções em andamento."""
+        if self._task is not None:
+            # Sinaliza pelo evento: o cancelamento pode se perder dentro de wait_for.
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _loop(self) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+            delay = self._heap[0][0] - time.time() if self._heap else None
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due, entry_id = heapq.heappop(self._heap)
+            entry = self._entries.get(entry_id)
+            if entry is None or entry.next_run != due:
+                continue  # Tarefa removida ou reagendada
+
+            now = time.time()
+            late = now - due > self.MISFIRE_GRACE
+            if late and entry.missed_policy == "skip":
+                logger.info(f"Agendamento {entry.id} atrasado {now - due:.0f}s; execução ignorada.")
+            else:
+                self._fire(entry)
+            entry.last_run = due
+            spec = CronSpec.parse(entry.spec)
+            self._push(entry, spec.next_after(datetime.fromtimestamp(max(now, due))).timestamp())
+            self._save()
+
+    def _fire(self, entry: ScheduleEntry) -> None:
+        """Dispara a tarefa em segundo plano, sem bloquear o loop do agendador."""
+        logger.info(f"Executando agendamento {entry.id}: {entry.action} {entry.target}")
+        task = asyncio.create_task(self._run_entry(entry))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_entry(self, entry: ScheduleEntry) -> None:
+        try:
+            await self._runner(entry)
+        except Exception as e:
+            logger.error(f"Falha no agendamento {entry.id}: {e}", exc_info=True)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import final
 from enum import Enum
 class Icons(Enum):
@@ -11,6 +12,28 @@ class Icons(Enum):
     WARNING = "⚠️"
     SUCCESS = "🎉"
     LOADING = "⏳"
+    SCHEDULE = "🕒"
+    TIMER = "⏱️"
+    RELOAD = "🔄"
+    HISTORY = "📋"
+    DENIED = "⛔"
+
+# Verbos por ação: (gerúndio, particípio).
+ACTION_VERBS = {
+    "start": ("Ligando", "ligado"),
+    "stop": ("Desligando", "desligado"),
+    "restart": ("Reiniciando", "reiniciado"),
+}
+
+# Ícone por resultado de um registro de auditoria.
+OUTCOME_ICONS = {
+    "ok": Icons.STATUS_OK,
+    "failed": Icons.ERROR,
+    "error": Icons.ERROR,
+    "timeout": Icons.WARNING,
+    "cancelled": Icons.STATUS_OFF,
+    "denied": Icons.DENIED,
+}
 
 class MessageType(Enum):
     INFO = "info"
@@ -32,6 +55,10 @@ class BotMessages:
             "*/status* - Mostra um resumo rápido de quantos apps estão ativos.\n"
             f"*/scripts* - {Icons.SCRIPTS.value} Lista os scripts disponíveis para execução.\n"
             "*/run `[nome_do_script]`* - Executa um script específico.\n"
+            "*/restart `[nome_do_app]`* - Reinicia um aplicativo.\n"
+            f"*/schedule* - {Icons.SCHEDULE.value} Lista, adiciona ou remove tarefas agendadas.\n"
+            f"*/history `[app]` `[n]`* - {Icons.HISTORY.value} Mostra as últimas ações, scripts e acessos negados.\n"
+            f"*/reload* - {Icons.RELOAD.value} Recarrega a configuração sem reiniciar o bot.\n"
             "*/help* - Mostra esta mensagem de ajuda.\n\n"
             f"{Icons.TIP.value} *Dica*: Envie o nome de um app (ex: `jellyfin`) para iniciá-lo ou pará-lo."
         )
@@ -55,7 +82,10 @@ class BotMessages:
         if stopped_apps:
             lines.append(f"{Icons.STATUS_OFF.value} *Inativos ({len(stopped_apps)}):*")
             for app in sorted(stopped_apps, key=lambda x: x.id):
-                lines.append(f"  • `{app.id}`")
+                if app.status.value == "stopped":
+                    lines.append(f"  • `{app.id}`")
+                else:
+                    lines.append(f"  • `{app.id}` (`{app.status_label}`)")
         
         return "\n".join(lines)
 
@@ -88,12 +118,26 @@ class BotMessages:
         return "\n".join(lines)
 
     @staticmethod
-    def format_script_output(script_name: str, stdout: str, stderr: str, exit_code: int) -> str:
+    def format_script_output(
+        script_name: str,
+        stdout: str,
+        stderr: str,
+        exit_code: int,
+        usage: str = None,
+        signal_name: str = None,
+        truncated: bool = False,
+    ) -> str:
         """Formata a saída de um script executado."""
         success_icon = Icons.SUCCESS.value if exit_code == 0 else Icons.ERROR.value
         status = "sucesso" if exit_code == 0 else "falha"
         
         header = f"{success_icon} Execução de `{script_name}` - {status} (código: {exit_code})"
+        if signal_name:
+            header += f"\n{Icons.WARNING.value} Encerrado pelo sinal `{signal_name}` (possível limite de recursos)."
+        if usage:
+            header += f"\n{usage}"
+        if truncated:
+            header += f"\n{Icons.WARNING.value} A saída excedeu o limite do perfil e foi cortada."
         max_length = 3000
         
         if stdout:
@@ -112,16 +156,125 @@ class BotMessages:
         return f"{header}{output_str}{error_str}"
 
     @staticmethod
-    def format_app_action_result(app_id: str, action: str, success: bool, error: str = None) -> str:
+    def format_script_usage(elapsed: float, rusage=None) -> str:
+        """Formata o consumo de recursos de uma execução (tempo, CPU e memória máxima)."""
+        parts = [f"{elapsed:.1f}s"]
+        if rusage is not None:
+            parts.append(f"CPU {rusage.ru_utime:.1f}s user / {rusage.ru_stime:.1f}s sys")
+            parts.append(f"RAM máx {rusage.ru_maxrss / 1024:.1f} MiB")  # ru_maxrss em KiB no Linux
+        return f"{Icons.TIMER.value} {' | '.join(parts)}"
+
+    @staticmethod
+    def format_schedule_entry(entry) -> str:
+        """Formata uma tarefa agendada em uma linha."""
+        target = f"`{entry.target}`"
+        action = "executar" if entry.action == "run" else entry.action
+        catchup = " (recupera execuções perdidas)" if entry.missed_policy == "run_once" else ""
+        return f"`{entry.spec}` → {action} {target}{catchup}"
+
+    @staticmethod
+    def format_schedule_list(entries: list) -> str:
+        """Formata a lista de tarefas agendadas com o próximo disparo."""
+        if not entries:
+            return f"{Icons.WARNING.value} Nenhuma tarefa agendada. Use `/schedule add` para criar uma."
+
+        timezone = datetime.now().astimezone().tzname()
+        lines = [f"{Icons.SCHEDULE.value} *Tarefas Agendadas ({len(entries)}, horários em {timezone}):*\n"]
+        for entry in entries:
+            next_run = (
+                datetime.fromtimestamp(entry.next_run).strftime("%d/%m %H:%M")
+                if entry.next_run else "—"
+            )
+            lines.append(f"`{entry.id}` {BotMessages.format_schedule_entry(entry)}")
+            lines.append(f"    próxima: {next_run}")
+        lines.append(f"\n{Icons.TIP.value} Use `/schedule remove [id]` para remover.")
+        return "\n".join(lines)
+
+    @staticmethod
+    def format_history_entry(entry) -> str:
+        """Formata um registro de auditoria em uma linha."""
+        when = datetime.fromtimestamp(entry.ts).strftime("%d/%m %H:%M")
+        icon = OUTCOME_ICONS.get(entry.outcome, Icons.WARNING).value
+        if entry.event == "denied":
+            line = f"acesso negado `{entry.action.replace('`', '')}`"
+        else:
+            line = f"{entry.action} `{entry.target}`"
+            if entry.outcome != "ok":
+                line += f" ({entry.outcome})"
+            if "returncode" in entry.details and entry.details["returncode"] != 0:
+                line += f" código {entry.details['returncode']}"
+        if entry.duration is not None:
+            line += f" — {entry.duration:.1f}s"
+        return f"`{when}` {icon} {line} · `{entry.actor}`"
+
+    @staticmethod
+    def format_history(entries: list, target: str = None, durations: list[float] = None) -> str:
+        """Formata o histórico de auditoria, com a latência das ações bem-sucedidas quando filtrado por alvo."""
+        if not entries:
+            scope = f" para `{target}`" if target else ""
+            return f"{Icons.WARNING.value} Nenhum registro no histórico{scope}."
+
+        scope = f" de `{target}`" if target else ""
+        lines = [f"{Icons.HISTORY.value} *Histórico{scope} (últimos {len(entries)}):*\n"]
+        lines.extend(BotMessages.format_history_entry(entry) for entry in entries)
+        if durations:
+            lines.append(
+                f"\n{Icons.TIMER.value} Concluídas com sucesso: média {sum(durations) / len(durations):.1f}s, "
+                f"máx {max(durations):.1f}s ({len(durations)})"
+            )
+        return "\n".join(lines)
+
+    @staticmethod
+    def format_config_reload(applied: list[str], restart_required: list[str]) -> str:
+        """Formata o resultado da recarga de configuração."""
+        if not applied and not restart_required:
+            return f"{Icons.RELOAD.value} Configuração recarregada: nenhuma alteração encontrada."
+
+        lines = [f"{Icons.RELOAD.value} *Configuração recarregada.*"]
+        if applied:
+            lines.append("Aplicado: " + ", ".join(f"`{name}`" for name in applied))
+        if restart_required:
+            lines.append(
+                f"{Icons.WARNING.value} Requer reinício (ignorado): "
+                + ", ".join(f"`{name}`" for name in restart_required)
+            )
+        return "\n".join(lines)
+
+    @staticmethod
+    def format_app_action_result(app_id: str, action: str, success: bool, error: str = None, elapsed: float = None) -> str:
         """Formata o resultado de uma ação em um app."""
         if success:
             icon = Icons.SUCCESS.value
-            verb = "ligado" if action == "start" else "desligado"
-            return f"{icon} App `{app_id}` foi {verb} com sucesso!"
+            verb = ACTION_VERBS.get(action, ACTION_VERBS["start"])[1]
+            duration = f" em {elapsed:.0f}s" if elapsed is not None else ""
+            return f"{icon} App `{app_id}` foi {verb} com sucesso{duration}!"
         else:
             icon = Icons.ERROR.value
             return f"{icon} Falha ao {action} o app `{app_id}`: {error or 'Erro desconhecido'}"
 
+    @staticmethod
+    def format_app_action_progress(app_id: str, action: str, status: str = None, elapsed: float = None) -> str:
+        """Formata o progresso de uma ação aguardando o app convergir."""
+        verb = ACTION_VERBS.get(action, ACTION_VERBS["start"])[0]
+        if status is None or elapsed is None:
+            return f"{Icons.LOADING.value} {verb} `{app_id}`..."
+        return f"{Icons.LOADING.value} {verb} `{app_id}`... (status: `{status}`, {elapsed:.0f}s)"
+
+    @staticmethod
+    def format_app_action_in_progress(app_id: str, action: str) -> str:
+        """Formata o aviso de que já existe uma ação pendente para o app."""
+        verb = ACTION_VERBS.get(action, ACTION_VERBS["start"])[1]
+        return f"{Icons.LOADING.value} `{app_id}` já está sendo {verb}; acompanhando a ação em andamento..."
+
+    @staticmethod
+    def format_app_action_timeout(app_id: str, action: str, status: str, elapsed: float) -> str:
+        """Formata o aviso de uma ação que não convergiu dentro do tempo limite."""
+        verb = ACTION_VERBS.get(action, ACTION_VERBS["start"])[1]
+        return (
+            f"{Icons.WARNING.value} App `{app_id}` ainda não foi {verb} após {elapsed:.0f}s "
+            f"(status atual: `{status}`)."
+        )
+
     @staticmethod
     def format_error_message(error: str, context: str = None) -> str:
         """Formata uma mensagem de erro."""
@@ -0,0 +1,97 @@
+import sys
+import copy
+import json
+import queue
+import logging
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# ID da requisição (update do Telegram) em processamento, propagado para as tasks filhas.
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Atributos padrão de LogRecord; o que não estiver aqui veio de `extra=`.
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+_EXC_FORMATTER = logging.Formatter()
+
+class RequestContextFilter(logging.Filter):
+    """Anexa o ID da requisição atual ao registro, ainda na thread de origem."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON, incluindo os campos de `extra=`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and value is not None:
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que só resolve a mensagem e o traceback na thread de origem.
+
+    O QueueHandler padrão embute o traceback na mensagem; aqui ele vai para
+    `exc_text`, e a formatação final (timestamp, JSON) fica para a thread do
+    QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging(level: str = "INFO", fmt: str = "text") -> QueueListener:
+    """
+    Configura o logging raiz para escrever fora do event loop.
+
+    Os handlers do root passam a ser um único QueueHandler; um QueueListener em
+    thread própria faz a formatação e a escrita em stdout.
+
+    Args:
+        level (str): Nível mínimo de log (ex.: INFO, DEBUG).
+        fmt (str): `text` ou `json` (uma linha JSON por registro, com request_id e durações).
+
+    Returns:
+        QueueListener: Listener já iniciado; chame `stop()` no encerramento para descarregar a fila.
+    """
+    if fmt not in ("text", "json"):
+        raise ValueError(f"LOG_FORMAT deve ser 'text' ou 'json', recebido: {fmt}")
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level.upper())
+
+    for noisy_logger in ("httpx", "urllib3", "requests"):
+        logging.getLogger(noisy_logger).setLevel(logging.WARNING)
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
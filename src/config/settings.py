@@ -1,11 +1,22 @@
 import os
 import dataclasses
-from dotenv import load_dotenv
-from typing import final
+from dotenv import dotenv_values, load_dotenv
+from typing import Mapping, final, Optional
 from pathlib import Path
 
+# Ambiente do processo sem os valores vindos do .env (inclusive via `env_file` do
+# compose), base para as recargas da configuração.
+_startup_file = dotenv_values()
+_BASE_ENV = {key: value for key, value in os.environ.items() if _startup_file.get(key) != value}
+
 load_dotenv()
 
+# Campos lidos apenas na inicialização: mudanças só valem após reiniciar o bot.
+RESTART_REQUIRED_FIELDS = frozenset({
+    "telegram_token", "data_path", "max_concurrent_updates", "max_concurrent_scripts",
+    "audit_log_path", "audit_max_bytes",
+})
+
 @final
 @dataclasses.dataclass(frozen=True)
 class BotConfig:
@@ -18,46 +29,92 @@ class BotConfig:
     runtipi_username: str
     runtipi_password: str
     scripts_path: str
+    data_path: str = "/app/data"  # Estado persistente (ex.: agendamentos)
+    script_profiles_path: Optional[str] = None  # Perfis de execução (padrão: <scripts_path>/profiles.json)
     api_timeout: int = 15  # ✅ Timeout configurável
     cache_ttl: int = 15    # ✅ TTL do cache configurável
+    action_timeout: int = 120  # Tempo máximo aguardando um app atingir o status alvo
+    max_concurrent_updates: int = 8  # Updates processados em paralelo (ordem preservada por chat)
+    max_concurrent_scripts: int = 2  # Scripts executados em paralelo, fora da fila de updates
+    shutdown_timeout: int = 6  # Tempo máximo aguardando scripts e ações em andamento ao encerrar
+    audit_log_path: Optional[str] = None  # Log de auditoria (padrão: <data_path>/audit.log)
+    audit_max_bytes: int = 1024 * 1024  # Tamanho de cada arquivo do log de auditoria antes da rotação
 
     @classmethod
-    def from_env(cls) -> 'BotConfig':
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> 'BotConfig':
         """
-        Cria uma instância de BotConfig a partir de variáveis de ambiente.
+        Cria uma instância de BotConfig a partir de variáveis de ambiente
+        (`os.environ`, ou `environ` se informado).
         Levanta um ValueError se uma variável essencial estiver ausente ou inválida.
         """
+        env = os.environ if environ is None else environ
         try:
-            chat_id_str = os.environ["TELEGRAM_CHAT_ID"]
+            chat_id_str = env["TELEGRAM_CHAT_ID"]
             try:
                 chat_id = int(chat_id_str)
             except ValueError:
                 raise ValueError(f"TELEGRAM_CHAT_ID deve ser um número inteiro, recebido: {chat_id_str}")
-            scripts_path = os.getenv("SCRIPTS_PATH", "/scripts")
+            scripts_path = env.get("SCRIPTS_PATH", "/scripts")
             if not Path(scripts_path).exists():
                 raise FileNotFoundError(f"Diretório de scripts não encontrado: {scripts_path}")
-            runtipi_host = os.getenv("RUNTIPI_HOST", "http://localhost:8080")
+            runtipi_host = env.get("RUNTIPI_HOST", "http://localhost:8080")
             if not runtipi_host.startswith(('http://', 'https://')):
                 raise ValueError(f"RUNTIPI_HOST deve começar com http:// ou https://, recebido: {runtipi_host}")
             
             return cls(
-                telegram_token=os.environ["TELEGRAM_TOKEN"],
+                telegram_token=env["TELEGRAM_TOKEN"],
                 telegram_chat_id=chat_id,
                 runtipi_host=runtipi_host,
-                runtipi_username=os.environ["RUNTIPI_USERNAME"],
-                runtipi_password=os.environ["RUNTIPI_PASSWORD"],
+                runtipi_username=env["RUNTIPI_USERNAME"],
+                runtipi_password=env["RUNTIPI_PASSWORD"],
                 scripts_path=scripts_path,
-                api_timeout=int(os.getenv("API_TIMEOUT", "15")),
-                cache_ttl=int(os.getenv("CACHE_TTL", "15")),
+                data_path=env.get("DATA_PATH", "/app/data"),
+                script_profiles_path=env.get("SCRIPT_PROFILES") or None,
+                api_timeout=int(env.get("API_TIMEOUT", "15")),
+                cache_ttl=int(env.get("CACHE_TTL", "15")),
+                action_timeout=int(env.get("ACTION_TIMEOUT", "120")),
+                max_concurrent_updates=int(env.get("MAX_CONCURRENT_UPDATES", "8")),
+                max_concurrent_scripts=int(env.get("MAX_CONCURRENT_SCRIPTS", "2")),
+                shutdown_timeout=int(env.get("SHUTDOWN_TIMEOUT", "6")),
+                audit_log_path=env.get("AUDIT_LOG") or None,
+                audit_max_bytes=int(env.get("AUDIT_MAX_BYTES", str(1024 * 1024))),
             )
         except KeyError as e:
             raise ValueError(f"Variável de ambiente obrigatória ausente: {e}") from e
         except (ValueError, FileNotFoundError) as e:
             raise ValueError(f"Configuração inválida: {e}") from e
 
+    @classmethod
+    def reload(cls) -> 'BotConfig':
+        """
+        Relê o arquivo .env e cria uma nova configuração a partir dele, sobreposto ao
+        ambiente original do processo: uma variável removida do arquivo volta ao valor
+        original (ou ao padrão), em vez de manter o valor carregado antes.
+        Levanta um ValueError se a nova configuração for inválida; nesse caso nada deve ser aplicado.
+        """
+        file_values = {key: value for key, value in dotenv_values().items() if value is not None}
+        return cls.from_env({**_BASE_ENV, **file_values})
+
+    def changed_fields(self, other: 'BotConfig') -> list[str]:
+        """Retorna os nomes dos campos com valores diferentes em `other`."""
+        return [
+            f.name for f in dataclasses.fields(self)
+            if getattr(self, f.name) != getattr(other, f.name)
+        ]
+
     def __post_init__(self):
         """Validações adicionais após inicialização."""
         if self.api_timeout <= 0:
             raise ValueError("API_TIMEOUT deve ser maior que zero")
         if self.cache_ttl <= 0:
-            raise ValueError("CACHE_TTL deve ser maior que zero")
\ No newline at end of file
+            raise ValueError("CACHE_TTL deve ser maior que zero")
+        if self.action_timeout <= 0:
+            raise ValueError("ACTION_TIMEOUT deve ser maior que zero")
+        if self.max_concurrent_updates <= 0:
+            raise ValueError("MAX_CONCURRENT_UPDATES deve ser maior que zero")
+        if self.max_concurrent_scripts <= 0:
+            raise ValueError("MAX_CONCURRENT_SCRIPTS deve ser maior que zero")
+        if self.shutdown_timeout <= 0:
+            raise ValueError("SHUTDOWN_TIMEOUT deve ser maior que zero")
+        if self.audit_max_bytes <= 0:
+            raise ValueError("AUDIT_MAX_BYTES deve ser maior que zero")
\ No newline at end of file
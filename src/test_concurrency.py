@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from telegram import Chat, Message, Update
+
+from bot.services.concurrency import ChatOrderedUpdateProcessor
+
+def _update(update_id, chat_id=None):
+    """Update de texto do chat `chat_id`, ou sem chat se omitido."""
+    if chat_id is None:
+        return Update(update_id)
+    chat = Chat(chat_id, Chat.PRIVATE)
+    return Update(update_id, message=Message(update_id, datetime.now(), chat, text="x"))
+
+def test_rejects_non_positive_limit():
+    with pytest.raises(ValueError):
+        ChatOrderedUpdateProcessor(0)
+
+def test_same_chat_updates_keep_arrival_order():
+    async def run():
+        processor = ChatOrderedUpdateProcessor(4)
+        finished = []
+
+        async def handle(update_id, delay):
+            await asyncio.sleep(delay)
+            finished.append(update_id)
+
+        # Os primeiros são os mais lentos: sem a ordenação, terminariam por último.
+        await asyncio.gather(*(
+            processor.process_update(_update(i, chat_id=1), handle(i, 0.03 - i * 0.01))
+            for i in range(3)
+        ))
+        assert finished == [0, 1, 2]
+        assert processor._chat_locks == {}  # Locks descartados ao fim do chat
+    asyncio.run(run())
+
+def test_waiting_updates_do_not_hold_slots():
+    async def run():
+        processor = ChatOrderedUpdateProcessor(2)
+        release = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+
+        async def quick():
+            pass
+
+        # Uma rajada do chat 1 (o primeiro preso) não pode ocupar a segunda vaga.
+        burst = [asyncio.create_task(processor.process_update(_update(i, chat_id=1), blocked())) for i in range(3)]
+        other = asyncio.create_task(processor.process_update(_update(10, chat_id=2), quick()))
+        await asyncio.wait_for(other, timeout=1)
+        assert not any(task.done() for task in burst)
+
+        release.set()
+        await asyncio.gather(*burst)
+    asyncio.run(run())
+
+def test_global_limit_applies_across_chats_and_chatless_updates():
+    async def run():
+        processor = ChatOrderedUpdateProcessor(2)
+        active = peak = 0
+
+        async def handle():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        updates = [_update(i, chat_id=i) for i in range(4)] + [_update(i) for i in range(4, 6)]
+        await asyncio.gather(*(processor.process_update(update, handle()) for update in updates))
+        assert peak == 2
+    asyncio.run(run())
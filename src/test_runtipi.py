@@ -34,22 +34,13 @@ def test_runtipi_api():
     
     if apps_data:
         print("✅ Apps obtidos com sucesso")
-        
-        if 'installed' in apps_data:
-            apps = apps_data['installed']
-            print(f"📱 Total de apps: {len(apps)}")
-            
-            for app in apps[:5]:  # Mostra apenas os primeiros 5
-                app_id = app['info']['id']
-                app_name = app['info'].get('name', app_id)
-                status = app['app']['status']
-                print(f"  • {app_id} ({app_name}): {status}")
-                
-            if len(apps) > 5:
-                print(f"  ... e mais {len(apps) - 5} apps")
-        else:
-            print("⚠️ Estrutura de dados inesperada:")
-            print(f"Keys disponíveis: {list(apps_data.keys())}")
+        print(f"📱 Total de apps: {len(apps_data)}")
+
+        for app in apps_data[:5]:  # Mostra apenas os primeiros 5
+            print(f"  • {app.id} ({app.name}): {app.status_label}")
+
+        if len(apps_data) > 5:
+            print(f"  ... e mais {len(apps_data) - 5} apps")
     else:
         print("❌ Falha ao obter apps")
         return False
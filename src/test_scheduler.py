@@ -0,0 +1,103 @@
+import json
+import time
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from bot.services.scheduler import CronSpec, Scheduler
+
+def test_cron_parse_ranges_steps_and_aliases():
+    spec = CronSpec.parse("*/15 9-17/4 * * 1-5,7")
+    assert spec.minutes == {0, 15, 30, 45}
+    assert spec.hours == {9, 13, 17}
+    assert spec.weekdays == {0, 1, 2, 3, 4, 5}  # 7 também é domingo
+    assert CronSpec.parse("02:30").minutes == {30}
+    assert CronSpec.parse("02:30").hours == {2}
+    assert CronSpec.parse("@daily").next_after(datetime(2026, 4, 4, 12)) == datetime(2026, 4, 5)
+
+@pytest.mark.parametrize("expression", ["61 * * * *", "* * *", "5-1 * * * *", "*/0 * * * *", "x * * * *", "24:00"])
+def test_cron_parse_rejects_invalid(expression):
+    with pytest.raises(ValueError):
+        CronSpec.parse(expression)
+
+def test_cron_day_of_month_or_day_of_week():
+    # Com os dois campos restritos, basta um coincidir: todo dia 13 ou toda sexta-feira.
+    spec = CronSpec.parse("0 0 13 * 5")
+    moment, fired = datetime(2026, 4, 4), []
+    for _ in range(3):
+        moment = spec.next_after(moment)
+        fired.append(moment)
+    assert fired == [datetime(2026, 4, 10), datetime(2026, 4, 13), datetime(2026, 4, 17)]
+
+def test_cron_single_restricted_day_field():
+    assert CronSpec.parse("0 0 13 * *").next_after(datetime(2026, 4, 4)) == datetime(2026, 4, 13)
+    assert CronSpec.parse("0 0 * * 1").next_after(datetime(2026, 4, 4)) == datetime(2026, 4, 6)
+
+def test_cron_next_after_is_strict_and_skips_weekends():
+    spec = CronSpec.parse("0 9-17/4 * * 1-5")
+    assert spec.next_after(datetime(2026, 4, 10, 13)) == datetime(2026, 4, 10, 17)
+    assert spec.next_after(datetime(2026, 4, 10, 17)) == datetime(2026, 4, 13, 9)
+
+def _write_entries(path, *entries):
+    path.write_text(json.dumps(list(entries)), encoding="utf-8")
+
+def _missed_entry(entry_id, policy):
+    # Criada há dois dias, nunca executada: perdeu várias execuções de hora em hora.
+    return {
+        "id": entry_id, "spec": "@hourly", "action": "stop", "target": "plex",
+        "missed_policy": policy, "created_at": time.time() - 2 * 86400,
+    }
+
+async def _record(fired, entry):
+    fired.append(entry.id)
+
+def _run_scheduler(scheduler, before_start=None):
+    """Carrega as tarefas e executa o loop do agendador brevemente."""
+    async def run():
+        scheduler.load()
+        if before_start is not None:
+            before_start(scheduler)
+        await scheduler.start()
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+    asyncio.run(run())
+
+def test_missed_runs_skip_policy(tmp_path):
+    path = tmp_path / "schedule.json"
+    _write_entries(path, _missed_entry(1, "skip"))
+    fired = []
+    scheduler = Scheduler(str(path), lambda entry: _record(fired, entry))
+    _run_scheduler(scheduler)
+    assert fired == []
+    assert scheduler.entries()[0].next_run > time.time()
+
+def test_missed_runs_run_once_policy(tmp_path):
+    path = tmp_path / "schedule.json"
+    _write_entries(path, _missed_entry(1, "run_once"))
+    fired = []
+    scheduler = Scheduler(str(path), lambda entry: _record(fired, entry))
+    _run_scheduler(scheduler)
+    assert fired == [1]  # Uma única vez, mesmo com várias execuções perdidas
+    entry = scheduler.entries()[0]
+    assert entry.last_run is not None and entry.next_run > time.time()
+    assert json.loads(path.read_text(encoding="utf-8"))[0]["last_run"] == entry.last_run
+
+def test_removed_entry_does_not_fire(tmp_path):
+    path = tmp_path / "schedule.json"
+    _write_entries(path, _missed_entry(1, "run_once"))
+    fired = []
+    scheduler = Scheduler(str(path), lambda entry: _record(fired, entry))
+    _run_scheduler(scheduler, before_start=lambda s: s.remove(1))
+    assert fired == []
+    assert scheduler.entries() == []
+    assert json.loads(path.read_text(encoding="utf-8")) == []
+
+def test_add_after_load_uses_next_id(tmp_path):
+    path = tmp_path / "schedule.json"
+    _write_entries(path, _missed_entry(1, "skip"))
+    scheduler = Scheduler(str(path), lambda entry: _record([], entry))
+    scheduler.load()
+    entry = scheduler.add("02:00", "stop", "plex")
+    assert entry.id == 2
+    assert sorted(e.id for e in scheduler.entries()) == [1, 2]